@@ -0,0 +1,126 @@
+"""Squashed baseline
+
+Builds the schema as of revision a71070480552 in a single pass, for fresh
+installs only. env.py runs this against an empty database and stamps
+``stamp_revision`` instead of replaying 001 onwards, which creates columns
+(admins.email, admins.drive_cred_type) and indexes that later revisions
+immediately drop. Existing deployments keep upgrading through versions/.
+
+When squashing again, rebuild this file from the new head and bump
+``stamp_revision``; revisions after it keep running on top as usual.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# Revision whose schema this baseline reproduces
+stamp_revision = 'a71070480552'
+
+UTC_NOW = sa.text("timezone('utc', now())")
+
+
+def upgrade() -> None:
+    # Create enum type
+    role_enum = postgresql.ENUM('user', 'admin', 'superadmin', name='roleenum')
+    role_enum.create(op.get_bind())
+
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('password_hash', sa.String(), nullable=False),
+        sa.Column('role', postgresql.ENUM('user', 'admin', 'superadmin', name='roleenum', create_type=False), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=UTC_NOW, nullable=True),
+        sa.Column('updated_at', sa.DateTime(), server_default=UTC_NOW, nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("ALTER TABLE users SET (autovacuum_vacuum_scale_factor = 0.05)")
+
+    # Constraint names match what PostgreSQL generated for the unnamed ones
+    # created in 59d71681e084, so later revisions can address either install
+    op.create_table(
+        'admins',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('encrypted_drive_cred', sa.Text(), nullable=True),
+        sa.Column('drive_folder_id', sa.String(), nullable=True),
+        sa.Column('folder_pendientes_id', sa.String(), nullable=True),
+        sa.Column('folder_en_revision_id', sa.String(), nullable=True),
+        sa.Column('folder_aprobados_id', sa.String(), nullable=True),
+        sa.Column('folder_rechazados_id', sa.String(), nullable=True),
+        sa.Column('folder_archivados_id', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=UTC_NOW, nullable=True),
+        sa.Column('updated_at', sa.DateTime(), server_default=UTC_NOW, nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], name='admins_user_id_fkey'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', name='admins_user_id_key')
+    )
+
+    op.create_table(
+        'user_admins',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('admin_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=UTC_NOW, nullable=True),
+        sa.ForeignKeyConstraint(['admin_id'], ['admins.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'admin_id')
+    )
+
+    op.create_table(
+        'files',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('filename', sa.String(), nullable=False),
+        sa.Column('original_filename', sa.String(), nullable=False),
+        sa.Column('drive_file_id', sa.String(), nullable=True),
+        sa.Column('mime_type', sa.String(), nullable=True),
+        sa.Column('file_size', sa.Integer(), nullable=True),
+        sa.Column('owner_admin_id', sa.Integer(), nullable=False),
+        sa.Column('uploaded_by_user_id', sa.Integer(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=UTC_NOW, nullable=True),
+        sa.Column('updated_at', sa.DateTime(), server_default=UTC_NOW, nullable=True),
+        sa.ForeignKeyConstraint(['owner_admin_id'], ['admins.id'], ),
+        sa.ForeignKeyConstraint(['uploaded_by_user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_table(
+        'comments',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('file_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=UTC_NOW, nullable=True),
+        sa.Column('updated_at', sa.DateTime(), server_default=UTC_NOW, nullable=True),
+        sa.ForeignKeyConstraint(['file_id'], ['files.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_table(
+        'comment_history',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('comment_id', sa.Integer(), nullable=False),
+        sa.Column('action', sa.String(), nullable=False),
+        sa.Column('previous_text', sa.Text(), nullable=True),
+        sa.Column('new_text', sa.Text(), nullable=True),
+        sa.Column('actor_user_id', sa.Integer(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), server_default=UTC_NOW, nullable=True),
+        sa.ForeignKeyConstraint(['actor_user_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['comment_id'], ['comments.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    # Tables are empty, so plain CREATE INDEX inside the transaction is fine
+    op.create_index('ix_users_email_covering', 'users', ['email'], unique=True, postgresql_include=['id', 'password_hash', 'role', 'created_at', 'updated_at'])
+    op.create_index('ix_user_admins_admin_id', 'user_admins', ['admin_id'], unique=False)
+    op.create_index('ix_files_drive_file_id', 'files', ['drive_file_id'], unique=False, postgresql_using='hash', postgresql_where=sa.text('drive_file_id IS NOT NULL'))
+    op.create_index('ix_files_uploaded_by_user_id', 'files', ['uploaded_by_user_id'], unique=False)
+    op.create_index('ix_files_owner_created', 'files', ['owner_admin_id', sa.text('created_at DESC')], unique=False)
+    op.create_index('ix_comments_user_id', 'comments', ['user_id'], unique=False)
+    op.create_index('ix_comments_file_created', 'comments', ['file_id', 'created_at'], unique=False)
+    op.create_index('ix_comment_history_actor_user_id', 'comment_history', ['actor_user_id'], unique=False)
+    op.create_index('ix_comment_history_comment_timestamp', 'comment_history', ['comment_id', 'timestamp'], unique=False)
@@ -1,7 +1,10 @@
 from logging.config import fileConfig
 from sqlalchemy import engine_from_config
+from sqlalchemy import inspect
 from sqlalchemy import pool
 from alembic import context
+from alembic.operations import Operations
+import importlib.util
 import os
 import sys
 
@@ -40,6 +43,33 @@ def get_url():
     return url
 
 
+# Squashed schema used to bootstrap empty databases (see its docstring)
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline", "000_squashed_baseline.py")
+
+
+def load_baseline():
+    """Load the squashed baseline module (not a revision in versions/)"""
+    spec = importlib.util.spec_from_file_location("squashed_baseline", BASELINE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def is_fresh_install(connection) -> bool:
+    """True when upgrading to head an empty database that has never been stamped"""
+    try:
+        destination = context.get_revision_argument()
+    except KeyError:
+        # Commands such as current/history do not target a revision
+        return False
+    # "head" resolves to a single revision, "heads" to a tuple of them
+    if isinstance(destination, str):
+        destination = (destination,)
+    if set(destination) != set(context.script.get_heads()):
+        return False
+    return not inspect(connection).get_table_names()
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -80,11 +110,23 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
+        fresh_install = is_fresh_install(connection)
+        # Inspecting autobegins a transaction; end it so begin_transaction()
+        # below owns (and commits) the migration transaction
+        connection.rollback()
         context.configure(
             connection=connection, target_metadata=target_metadata
         )
 
         with context.begin_transaction():
+            if fresh_install:
+                # Build the final schema directly and stamp it, so only the
+                # revisions newer than the baseline are replayed below
+                baseline = load_baseline()
+                migration_context = context.get_context()
+                with Operations.context(migration_context):
+                    baseline.upgrade()
+                migration_context.stamp(context.script, baseline.stamp_revision)
             context.run_migrations()
 
 
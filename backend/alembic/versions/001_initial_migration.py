@@ -38,8 +38,6 @@ def upgrade() -> None:
         sa.Column('updated_at', sa.DateTime(), nullable=True),
         sa.PrimaryKeyConstraint('id')
     )
-    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
-    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
     
     # Create admins table
     op.create_table(
@@ -54,8 +52,6 @@ def upgrade() -> None:
         sa.Column('updated_at', sa.DateTime(), nullable=True),
         sa.PrimaryKeyConstraint('id')
     )
-    op.create_index(op.f('ix_admins_email'), 'admins', ['email'], unique=True)
-    op.create_index(op.f('ix_admins_id'), 'admins', ['id'], unique=False)
     
     # Create user_admins association table
     op.create_table(
@@ -86,8 +82,6 @@ def upgrade() -> None:
         sa.ForeignKeyConstraint(['uploaded_by_user_id'], ['users.id'], ),
         sa.PrimaryKeyConstraint('id')
     )
-    op.create_index(op.f('ix_files_drive_file_id'), 'files', ['drive_file_id'], unique=False)
-    op.create_index(op.f('ix_files_id'), 'files', ['id'], unique=False)
     
     # Create comments table
     op.create_table(
@@ -102,7 +96,6 @@ def upgrade() -> None:
         sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
         sa.PrimaryKeyConstraint('id')
     )
-    op.create_index(op.f('ix_comments_id'), 'comments', ['id'], unique=False)
     
     # Create comment_history table
     op.create_table(
@@ -118,22 +111,38 @@ def upgrade() -> None:
         sa.ForeignKeyConstraint(['comment_id'], ['comments.id'], ondelete='CASCADE'),
         sa.PrimaryKeyConstraint('id')
     )
-    op.create_index(op.f('ix_comment_history_id'), 'comment_history', ['id'], unique=False)
+
+    # Build indexes CONCURRENTLY outside the migration transaction so re-running
+    # against a populated database does not lock out writers while they build
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_admins_email'), 'admins', ['email'], unique=True, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_user_admins_admin_id'), 'user_admins', ['admin_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_files_drive_file_id'), 'files', ['drive_file_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_files_owner_admin_id'), 'files', ['owner_admin_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_files_uploaded_by_user_id'), 'files', ['uploaded_by_user_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_comments_file_id'), 'comments', ['file_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_comments_user_id'), 'comments', ['user_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_comment_history_comment_id'), 'comment_history', ['comment_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_comment_history_actor_user_id'), 'comment_history', ['actor_user_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
 
 
 def downgrade() -> None:
-    op.drop_index(op.f('ix_comment_history_id'), table_name='comment_history')
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_comment_history_actor_user_id'), table_name='comment_history', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_comment_history_comment_id'), table_name='comment_history', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_comments_user_id'), table_name='comments', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_comments_file_id'), table_name='comments', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_files_uploaded_by_user_id'), table_name='files', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_files_owner_admin_id'), table_name='files', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_files_drive_file_id'), table_name='files', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_user_admins_admin_id'), table_name='user_admins', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_admins_email'), table_name='admins', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_users_email'), table_name='users', postgresql_concurrently=True, if_exists=True)
     op.drop_table('comment_history')
-    op.drop_index(op.f('ix_comments_id'), table_name='comments')
     op.drop_table('comments')
-    op.drop_index(op.f('ix_files_id'), table_name='files')
-    op.drop_index(op.f('ix_files_drive_file_id'), table_name='files')
     op.drop_table('files')
     op.drop_table('user_admins')
-    op.drop_index(op.f('ix_admins_id'), table_name='admins')
-    op.drop_index(op.f('ix_admins_email'), table_name='admins')
     op.drop_table('admins')
-    op.drop_index(op.f('ix_users_id'), table_name='users')
-    op.drop_index(op.f('ix_users_email'), table_name='users')
     op.drop_table('users')
     op.execute('DROP TYPE roleenum')
@@ -28,8 +28,9 @@ def upgrade() -> None:
         ondelete='CASCADE'
     )
     
-    # Create unique index on user_id
-    op.create_index('ix_admins_user_id', 'admins', ['user_id'], unique=True)
+    # Create unique index on user_id (CONCURRENTLY, outside the migration transaction)
+    with op.get_context().autocommit_block():
+        op.create_index('ix_admins_user_id', 'admins', ['user_id'], unique=True, postgresql_concurrently=True, if_not_exists=True)
     
     # Drop old email column and index
     op.drop_index('ix_admins_email', table_name='admins')
@@ -47,6 +48,7 @@ def downgrade() -> None:
     op.create_index('ix_admins_email', 'admins', ['email'], unique=True)
     
     # Drop user_id column and constraints
-    op.drop_index('ix_admins_user_id', table_name='admins')
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_admins_user_id', table_name='admins', postgresql_concurrently=True, if_exists=True)
     op.drop_constraint('fk_admins_user_id_users', 'admins', type_='foreignkey')
     op.drop_column('admins', 'user_id')
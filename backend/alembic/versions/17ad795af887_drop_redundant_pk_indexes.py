@@ -0,0 +1,38 @@
+"""drop_redundant_pk_indexes
+
+Revision ID: 17ad795af887
+Revises: 6cc231c4ce71
+Create Date: 2026-10-14 16:02:46.112932
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# Plain B-tree indexes on primary key columns, duplicating the unique index
+# PostgreSQL already builds for every PRIMARY KEY
+PK_INDEXES = (
+    ('ix_users_id', 'users'),
+    ('ix_admins_id', 'admins'),
+    ('ix_files_id', 'files'),
+    ('ix_comments_id', 'comments'),
+    ('ix_comment_history_id', 'comment_history'),
+)
+
+# revision identifiers, used by Alembic.
+revision = '17ad795af887'
+down_revision = '6cc231c4ce71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index_name, table in PK_INDEXES:
+            op.drop_index(index_name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index_name, table in PK_INDEXES:
+            op.create_index(index_name, table, ['id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
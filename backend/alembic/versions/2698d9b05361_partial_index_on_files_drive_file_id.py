@@ -0,0 +1,37 @@
+"""partial_index_on_files_drive_file_id
+
+Revision ID: 2698d9b05361
+Revises: 2de2c90d5b2a
+Create Date: 2026-10-14 16:10:40.022312
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2698d9b05361'
+down_revision = '2de2c90d5b2a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Files get their Drive ID only after the upload succeeds, so leave the
+    # NULL rows out of the index. The new index is built under a temporary
+    # name and swapped in, so lookups by drive_file_id are never unindexed
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_files_drive_file_id_partial', 'files', ['drive_file_id'], unique=False,
+            postgresql_where=sa.text('drive_file_id IS NOT NULL'),
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.drop_index('ix_files_drive_file_id', table_name='files', postgresql_concurrently=True, if_exists=True)
+    op.execute('ALTER INDEX ix_files_drive_file_id_partial RENAME TO ix_files_drive_file_id')
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_files_drive_file_id_full', 'files', ['drive_file_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_files_drive_file_id', table_name='files', postgresql_concurrently=True, if_exists=True)
+    op.execute('ALTER INDEX ix_files_drive_file_id_full RENAME TO ix_files_drive_file_id')
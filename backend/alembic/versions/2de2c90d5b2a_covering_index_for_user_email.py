@@ -0,0 +1,39 @@
+"""covering_index_for_user_email
+
+Revision ID: 2de2c90d5b2a
+Revises: 17ad795af887
+Create Date: 2026-10-14 16:05:30.623049
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2de2c90d5b2a'
+down_revision = '17ad795af887'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # INCLUDE every users column so get_user_by_email (login, auth) can be
+    # answered by an Index-Only Scan without touching the heap
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_email_covering', 'users', ['email'], unique=True,
+            postgresql_include=['id', 'password_hash', 'role', 'created_at', 'updated_at'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.drop_index('ix_users_email', table_name='users', postgresql_concurrently=True, if_exists=True)
+    
+    # Index-only scans need a fresh visibility map; vacuum users more eagerly
+    op.execute("ALTER TABLE users SET (autovacuum_vacuum_scale_factor = 0.05)")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE users RESET (autovacuum_vacuum_scale_factor)")
+    
+    with op.get_context().autocommit_block():
+        op.create_index('ix_users_email', 'users', ['email'], unique=True, postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_users_email_covering', table_name='users', postgresql_concurrently=True, if_exists=True)
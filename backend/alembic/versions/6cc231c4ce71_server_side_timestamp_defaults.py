@@ -0,0 +1,43 @@
+"""server_side_timestamp_defaults
+
+Revision ID: 6cc231c4ce71
+Revises: d156ba53d233
+Create Date: 2026-10-14 16:02:10.423159
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+UTC_NOW = sa.text("timezone('utc', now())")
+
+# Timestamp columns that PostgreSQL now fills in (updated_at is also set in
+# every UPDATE emitted by the ORM via the model's onupdate)
+TIMESTAMP_COLUMNS = (
+    ('users', 'created_at'),
+    ('users', 'updated_at'),
+    ('admins', 'created_at'),
+    ('admins', 'updated_at'),
+    ('user_admins', 'created_at'),
+    ('files', 'created_at'),
+    ('files', 'updated_at'),
+    ('comments', 'created_at'),
+    ('comments', 'updated_at'),
+    ('comment_history', 'timestamp'),
+)
+
+# revision identifiers, used by Alembic.
+revision = '6cc231c4ce71'
+down_revision = 'd156ba53d233'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(table, column, server_default=UTC_NOW)
+
+
+def downgrade() -> None:
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(table, column, server_default=None)
@@ -0,0 +1,41 @@
+"""hash_index_on_files_drive_file_id
+
+Revision ID: a71070480552
+Revises: 2698d9b05361
+Create Date: 2026-10-14 16:22:07.931606
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a71070480552'
+down_revision = '2698d9b05361'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # drive_file_id is only looked up by equality, so a hash index is smaller
+    # than the B-tree and avoids the tree descent. Built under a temporary
+    # name and swapped in, like the partial index it replaces
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_files_drive_file_id_hash', 'files', ['drive_file_id'], unique=False,
+            postgresql_using='hash', postgresql_where=sa.text('drive_file_id IS NOT NULL'),
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.drop_index('ix_files_drive_file_id', table_name='files', postgresql_concurrently=True, if_exists=True)
+    op.execute('ALTER INDEX ix_files_drive_file_id_hash RENAME TO ix_files_drive_file_id')
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_files_drive_file_id_btree', 'files', ['drive_file_id'], unique=False,
+            postgresql_where=sa.text('drive_file_id IS NOT NULL'),
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.drop_index('ix_files_drive_file_id', table_name='files', postgresql_concurrently=True, if_exists=True)
+    op.execute('ALTER INDEX ix_files_drive_file_id_btree RENAME TO ix_files_drive_file_id')
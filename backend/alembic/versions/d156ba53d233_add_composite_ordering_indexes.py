@@ -0,0 +1,39 @@
+"""add_composite_ordering_indexes
+
+Revision ID: d156ba53d233
+Revises: 59d71681e084
+Create Date: 2026-10-14 16:00:10.777937
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd156ba53d233'
+down_revision = '59d71681e084'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Composite indexes let WHERE fk = ? ORDER BY ts be served pre-sorted by an
+    # index scan; they also cover plain fk lookups, so the single-column FK
+    # indexes become redundant
+    with op.get_context().autocommit_block():
+        op.create_index('ix_comments_file_created', 'comments', ['file_id', 'created_at'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_comment_history_comment_timestamp', 'comment_history', ['comment_id', 'timestamp'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_files_owner_created', 'files', ['owner_admin_id', sa.text('created_at DESC')], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_comments_file_id', table_name='comments', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_comment_history_comment_id', table_name='comment_history', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_files_owner_admin_id', table_name='files', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_files_owner_admin_id', 'files', ['owner_admin_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_comment_history_comment_id', 'comment_history', ['comment_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_comments_file_id', 'comments', ['file_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_files_owner_created', table_name='files', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_comment_history_comment_timestamp', table_name='comment_history', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_comments_file_created', table_name='comments', postgresql_concurrently=True, if_exists=True)
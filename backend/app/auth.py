@@ -6,13 +6,14 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 
 from app.config import settings
 from app.db import get_db
 from app.models import User, RoleEnum
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing, built once at import and shared by every hash/verify
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 # Security scheme
 security = HTTPBearer()
@@ -70,7 +71,10 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    result = await db.execute(select(User).where(User.email == email))
+    # Admin endpoints need the profile, so it comes along in the same query
+    result = await db.execute(
+        select(User).options(joinedload(User.admin_profile)).where(User.email == email)
+    )
     user = result.scalar_one_or_none()
     
     if user is None:
@@ -83,13 +87,20 @@ async def get_current_user(
     return user
 
 
-async def require_role(required_roles: list[RoleEnum]):
+# Roles allowed through get_admin_user
+_ADMIN_ROLES = frozenset((RoleEnum.ADMIN, RoleEnum.SUPERADMIN))
+
+
+def require_role(*required_roles: RoleEnum):
     """Dependency factory to check user roles"""
+    allowed = frozenset(required_roles)
+    detail = f"Access forbidden. Required roles: {[r.value for r in required_roles]}"
+    
     async def check_role(current_user: User = Depends(get_current_user)) -> User:
-        if current_user.role not in required_roles:
+        if current_user.role not in allowed:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Access forbidden. Required roles: {[r.value for r in required_roles]}"
+                detail=detail
             )
         return current_user
     return check_role
@@ -98,7 +109,7 @@ async def require_role(required_roles: list[RoleEnum]):
 # Convenience dependencies
 async def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
     """Require admin or superadmin role"""
-    if current_user.role not in [RoleEnum.ADMIN, RoleEnum.SUPERADMIN]:
+    if current_user.role not in _ADMIN_ROLES:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required"
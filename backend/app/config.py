@@ -1,3 +1,5 @@
+from dataclasses import dataclass
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 from typing import List
 
@@ -11,6 +13,9 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRE_MINUTES: int = 1440
     
+    # Password hashing (work factor; tests lower it to keep fixtures fast)
+    BCRYPT_ROUNDS: int = 12
+    
     # Encryption
     ENCRYPTION_KEY: str
     
@@ -33,4 +38,27 @@ class Settings(BaseSettings):
         case_sensitive = True
 
 
-settings = Settings()
+@dataclass(frozen=True, slots=True)
+class FrozenSettings:
+    """Immutable snapshot of the validated Settings, read on hot paths (JWT, crypto)"""
+    DATABASE_URL: str
+    JWT_SECRET: str
+    JWT_ALGORITHM: str
+    JWT_EXPIRE_MINUTES: int
+    BCRYPT_ROUNDS: int
+    ENCRYPTION_KEY: str
+    GOOGLE_CLIENT_ID: str
+    GOOGLE_CLIENT_SECRET: str
+    OAUTH_REDIRECT_URI: str
+    SUPERADMIN_EMAIL: str
+    SUPERADMIN_PASSWORD: str
+    BACKEND_CORS_ORIGINS: List[str]
+
+
+@lru_cache
+def get_settings() -> FrozenSettings:
+    """Build settings once per process (env/.env parsing and validation)"""
+    return FrozenSettings(**Settings().model_dump())
+
+
+settings = get_settings()
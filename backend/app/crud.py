@@ -1,14 +1,27 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func, delete
-from sqlalchemy.orm import selectinload
-from typing import Optional, List
+from sqlalchemy import select, and_, or_, func, delete, update, insert, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
+from typing import Optional, List, Tuple
 from datetime import datetime
+import asyncio
 
-from app.models import User, Admin, File, Comment, CommentHistory, RoleEnum
+from app.models import User, Admin, File, Comment, CommentHistory, RoleEnum, user_admins, utcnow
 from app.auth import get_password_hash
 
 
+async def _exists(db: AsyncSession, model, *criteria) -> bool:
+    """SELECT EXISTS(...) probe for existence-only checks (no row is loaded)"""
+    return bool(await db.scalar(select(select(model.id).where(*criteria).exists())))
+
+
 # User CRUD
+async def user_email_exists(db: AsyncSession, email: str) -> bool:
+    """Check whether an email is already registered"""
+    return await _exists(db, User, User.email == email)
+
+
 async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     """Get user by email"""
     result = await db.execute(select(User).where(User.email == email))
@@ -30,32 +43,31 @@ async def create_user(db: AsyncSession, email: str, password: str, role: RoleEnu
     )
     db.add(user)
     await db.commit()
-    await db.refresh(user)
     return user
 
 
 async def update_user(db: AsyncSession, user_id: int, **kwargs) -> Optional[User]:
     """Update user"""
-    user = await get_user_by_id(db, user_id)
-    if not user:
-        return None
-    
     if 'password' in kwargs:
         kwargs['password_hash'] = get_password_hash(kwargs.pop('password'))
     
-    for key, value in kwargs.items():
-        if value is not None:
-            setattr(user, key, value)
+    values = {key: value for key, value in kwargs.items() if value is not None}
     
-    user.updated_at = datetime.utcnow()
+    result = await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(**values)
+        .returning(User)
+    )
+    user = result.scalar_one_or_none()
     await db.commit()
-    await db.refresh(user)
     return user
 
 
 async def delete_user(db: AsyncSession, user_id: int) -> bool:
     """Delete user"""
-    user = await get_user_by_id(db, user_id)
+    # ORM delete: admin_profile cascade is not backed by ON DELETE in the schema
+    user = await db.get(User, user_id)
     if not user:
         return False
     
@@ -64,9 +76,19 @@ async def delete_user(db: AsyncSession, user_id: int) -> bool:
     return True
 
 
-async def list_users(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[User]:
-    """List users"""
-    result = await db.execute(select(User).offset(skip).limit(limit))
+async def list_users(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None
+) -> List[User]:
+    """List users (pass the last seen id as after_id for keyset pagination)"""
+    query = select(User).order_by(User.id)
+    
+    if after_id is not None:
+        query = query.where(User.id > after_id)
+    
+    result = await db.execute(query.offset(skip).limit(limit))
     return result.scalars().all()
 
 
@@ -88,29 +110,107 @@ async def create_admin_profile(db: AsyncSession, user_id: int, name: str) -> Adm
     admin = Admin(user_id=user_id, name=name)
     db.add(admin)
     await db.commit()
-    await db.refresh(admin)
     return admin
 
 
-async def update_admin(db: AsyncSession, admin_id: int, **kwargs) -> Optional[Admin]:
-    """Update admin"""
-    admin = await get_admin_by_id(db, admin_id)
-    if not admin:
+async def get_user_with_admin_by_email(db: AsyncSession, email: str) -> Tuple[Optional[User], Optional[Admin]]:
+    """Get a user and their admin profile (if any) in one LEFT JOIN"""
+    result = await db.execute(
+        select(User, Admin).outerjoin(Admin, Admin.user_id == User.id).where(User.email == email)
+    )
+    row = result.first()
+    if row is None:
+        return None, None
+    return row.User, row.Admin
+
+
+async def create_admin(
+    db: AsyncSession,
+    email: str,
+    name: str,
+    password: str,
+    user_id: Optional[int] = None
+) -> Optional[Admin]:
+    """
+    Give the user behind email the admin role and an admin profile
+    
+    Pass user_id when the user is already known to exist; otherwise the user
+    is created with the given password. Everything is committed together.
+    Returns None (and changes nothing) if the user already has a profile.
+    """
+    if user_id is None:
+        # Upsert so a user registered concurrently is promoted, not duplicated
+        user_id = await db.scalar(
+            pg_insert(User)
+            .values(email=email, password_hash=get_password_hash(password), role=RoleEnum.ADMIN)
+            .on_conflict_do_update(
+                index_elements=[User.email],
+                # ON CONFLICT DO UPDATE does not apply Column.onupdate
+                set_={'role': RoleEnum.ADMIN, 'updated_at': utcnow()}
+            )
+            .returning(User.id)
+        )
+    else:
+        await db.execute(update(User).where(User.id == user_id).values(role=RoleEnum.ADMIN))
+    
+    # The profile may have been created since the caller checked; ON CONFLICT
+    # on admins.user_id turns that race into a None instead of an IntegrityError
+    admin = await db.scalar(
+        pg_insert(Admin)
+        .values(user_id=user_id, name=name)
+        .on_conflict_do_nothing(index_elements=[Admin.user_id])
+        .returning(Admin)
+    )
+    if admin is None:
+        await db.rollback()
         return None
     
-    for key, value in kwargs.items():
-        if value is not None:
-            setattr(admin, key, value)
+    await db.commit()
+    return admin
+
+
+async def update_user_role(db: AsyncSession, user_id: int, role: RoleEnum) -> Optional[User]:
+    """
+    Change a user's role, adding an admin profile when promoting to admin/superadmin
+    
+    Both statements run in one transaction; returns None if the user does not exist.
+    """
+    user = await db.scalar(
+        update(User).where(User.id == user_id).values(role=role).returning(User)
+    )
+    
+    if user is not None and role in (RoleEnum.ADMIN, RoleEnum.SUPERADMIN):
+        # ON CONFLICT on the admins.user_id unique constraint keeps an existing
+        # profile without a separate existence check
+        await db.execute(
+            pg_insert(Admin)
+            .values(user_id=user_id, name=user.email.partition('@')[0].capitalize())
+            .on_conflict_do_nothing(index_elements=[Admin.user_id])
+        )
     
-    admin.updated_at = datetime.utcnow()
     await db.commit()
-    await db.refresh(admin)
+    return user
+
+
+async def update_admin(db: AsyncSession, admin_id: int, **kwargs) -> Optional[Admin]:
+    """Update admin"""
+    values = {key: value for key, value in kwargs.items() if value is not None}
+    
+    result = await db.execute(
+        update(Admin)
+        .where(Admin.id == admin_id)
+        .values(**values)
+        .returning(Admin)
+    )
+    admin = result.scalar_one_or_none()
+    await db.commit()
     return admin
 
 
 async def delete_admin(db: AsyncSession, admin_id: int) -> bool:
     """Delete admin"""
-    admin = await get_admin_by_id(db, admin_id)
+    # ORM delete: files cascade is not backed by ON DELETE in the schema
+    admin = await db.get(Admin, admin_id)
     if not admin:
         return False
     
@@ -119,9 +219,19 @@ async def delete_admin(db: AsyncSession, admin_id: int) -> bool:
     return True
 
 
-async def list_admins(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Admin]:
-    """List admins"""
-    result = await db.execute(select(Admin).offset(skip).limit(limit))
+async def list_admins(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None
+) -> List[Admin]:
+    """List admins (pass the last seen id as after_id for keyset pagination)"""
+    query = select(Admin).order_by(Admin.id)
+    
+    if after_id is not None:
+        query = query.where(Admin.id > after_id)
+    
+    result = await db.execute(query.offset(skip).limit(limit))
     return result.scalars().all()
 
 
@@ -132,7 +242,7 @@ async def update_drive_credentials(
     drive_folder_id: str
 ) -> Optional[Admin]:
     """Update Google Drive Service Account credentials for admin/superadmin"""
-    from app.google_drive import GoogleDriveService
+    from app.google_drive import drive_service
     
     # Get or create admin profile
     admin = await get_admin_by_user_id(db, user_id)
@@ -141,78 +251,84 @@ async def update_drive_credentials(
         user = await get_user_by_id(db, user_id)
         if not user:
             return None
-        admin = await create_admin_profile(db, user_id, user.email.split('@')[0])
+        admin = await create_admin_profile(db, user_id, user.email.partition('@')[0])
     
-    # Encrypt credentials
-    drive_service = GoogleDriveService()
-    encrypted_cred = drive_service.encrypt_credentials(credentials_data)
+    # Encrypt credentials (CPU-bound, kept off the event loop)
+    loop = asyncio.get_running_loop()
+    encrypted_cred = await loop.run_in_executor(None, drive_service.encrypt_credentials, credentials_data)
     
     # Update admin
+    previous_cred = admin.encrypted_drive_cred
     admin.encrypted_drive_cred = encrypted_cred
     admin.drive_folder_id = drive_folder_id
-    admin.updated_at = datetime.utcnow()
     
     await db.commit()
-    await db.refresh(admin)
+    
+    # Replaced credentials must not linger in the decrypted/client caches
+    if previous_cred:
+        drive_service.invalidate_credentials(previous_cred)
     return admin
 
 
 async def get_drive_credentials(db: AsyncSession, user_id: int) -> Optional[dict]:
     """Get decrypted Google Drive Service Account credentials for admin/superadmin"""
-    from app.google_drive import GoogleDriveService
+    from app.google_drive import drive_service
     
     admin = await get_admin_by_user_id(db, user_id)
     if not admin or not admin.encrypted_drive_cred:
         return None
     
-    # Decrypt and return credentials
-    drive_service = GoogleDriveService()
-    credentials_data = drive_service.decrypt_credentials(admin.encrypted_drive_cred)
+    # Decrypt and return credentials (CPU-bound, kept off the event loop)
+    loop = asyncio.get_running_loop()
+    credentials_data = await loop.run_in_executor(None, drive_service.decrypt_credentials, admin.encrypted_drive_cred)
     return credentials_data
 
 
 async def delete_drive_credentials(db: AsyncSession, user_id: int) -> bool:
     """Delete Google Drive credentials for admin/superadmin"""
+    from app.google_drive import drive_service
+    
     admin = await get_admin_by_user_id(db, user_id)
     if not admin:
         return False
     
+    previous_cred = admin.encrypted_drive_cred
     admin.encrypted_drive_cred = None
-    admin.updated_at = datetime.utcnow()
     
     await db.commit()
+    
+    if previous_cred:
+        drive_service.invalidate_credentials(previous_cred)
     return True
 
 
 # User-Admin associations
 async def associate_user_with_admin(db: AsyncSession, user_id: int, admin_id: int) -> bool:
-    """Associate a user with an admin"""
-    user = await get_user_by_id(db, user_id)
-    admin = await get_admin_by_id(db, admin_id)
-    
-    if not user or not admin:
-        return False
-    
-    if admin not in user.assigned_admins:
-        user.assigned_admins.append(admin)
+    """Associate a user with an admin (idempotent)"""
+    try:
+        await db.execute(
+            pg_insert(user_admins)
+            .values(user_id=user_id, admin_id=admin_id)
+            .on_conflict_do_nothing()
+        )
         await db.commit()
+    except IntegrityError:
+        # FK violation: user or admin does not exist
+        await db.rollback()
+        return False
     
     return True
 
 
 async def disassociate_user_from_admin(db: AsyncSession, user_id: int, admin_id: int) -> bool:
-    """Disassociate a user from an admin"""
-    user = await get_user_by_id(db, user_id)
-    admin = await get_admin_by_id(db, admin_id)
-    
-    if not user or not admin:
-        return False
-    
-    if admin in user.assigned_admins:
-        user.assigned_admins.remove(admin)
-        await db.commit()
-    
-    return True
+    """Disassociate a user from an admin (False if they were not associated)"""
+    result = await db.execute(
+        delete(user_admins).where(
+            and_(user_admins.c.user_id == user_id, user_admins.c.admin_id == admin_id)
+        )
+    )
+    await db.commit()
+    return result.rowcount > 0
 
 
 async def get_user_admins(db: AsyncSession, user_id: int) -> List[Admin]:
@@ -224,6 +340,25 @@ async def get_user_admins(db: AsyncSession, user_id: int) -> List[Admin]:
     return user.assigned_admins if user else []
 
 
+async def get_user_admin_ids(db: AsyncSession, user_id: int) -> List[int]:
+    """IDs of the admins a user is associated with (read from the association table only)"""
+    result = await db.execute(
+        select(user_admins.c.admin_id)
+        .where(user_admins.c.user_id == user_id)
+        .order_by(user_admins.c.admin_id)
+    )
+    return result.scalars().all()
+
+
+async def user_has_admin(db: AsyncSession, user_id: int, admin_id: int) -> bool:
+    """Whether the user is associated with the admin (existence probe on the association)"""
+    return bool(await db.scalar(select(
+        select(user_admins.c.user_id)
+        .where(user_admins.c.user_id == user_id, user_admins.c.admin_id == admin_id)
+        .exists()
+    )))
+
+
 # File CRUD
 async def create_file(
     db: AsyncSession,
@@ -249,7 +384,6 @@ async def create_file(
     )
     db.add(file)
     await db.commit()
-    await db.refresh(file)
     return file
 
 
@@ -259,37 +393,128 @@ async def get_file_by_id(db: AsyncSession, file_id: int) -> Optional[File]:
     return result.scalar_one_or_none()
 
 
+async def get_file_with_owner(db: AsyncSession, file_id: int) -> Optional[File]:
+    """Get file by ID with its owner admin loaded in the same query"""
+    result = await db.execute(
+        select(File).options(joinedload(File.owner_admin)).where(File.id == file_id)
+    )
+    return result.scalar_one_or_none()
+
+
+async def check_file_access(db: AsyncSession, file_id: int, user_id: int) -> Optional[bool]:
+    """
+    Whether the user is associated with the file's owner admin, in one query
+    
+    Returns None if the file does not exist.
+    """
+    associated = (
+        select(user_admins.c.user_id)
+        .where(user_admins.c.user_id == user_id, user_admins.c.admin_id == File.owner_admin_id)
+        .exists()
+    )
+    return await db.scalar(select(associated).where(File.id == file_id))
+
+
+def _file_filters(
+    user_id: Optional[int] = None,
+    admin_id: Optional[int] = None,
+    admin_ids: Optional[List[int]] = None,
+    member_user_id: Optional[int] = None,
+    after_created_at: Optional[datetime] = None,
+    after_id: Optional[int] = None
+) -> list:
+    """WHERE criteria shared by list_files and count_files"""
+    criteria = []
+    if user_id:
+        criteria.append(File.uploaded_by_user_id == user_id)
+    if admin_id:
+        criteria.append(File.owner_admin_id == admin_id)
+    if admin_ids is not None:
+        criteria.append(File.owner_admin_id.in_(admin_ids))
+    if member_user_id is not None:
+        # Files owned by any admin the user is associated with
+        criteria.append(
+            select(user_admins.c.admin_id)
+            .where(user_admins.c.user_id == member_user_id, user_admins.c.admin_id == File.owner_admin_id)
+            .exists()
+        )
+    if after_created_at is not None and after_id is not None:
+        # Keyset cursor: files listed after the given one (newest first)
+        criteria.append(tuple_(File.created_at, File.id) < (after_created_at, after_id))
+    return criteria
+
+
+# Columns of one file listing row, in FileResponse field order
+_FILE_LIST_COLUMNS = (
+    File.filename, File.description, File.id, File.original_filename, File.drive_file_id,
+    File.mime_type, File.file_size, File.owner_admin_id, File.uploaded_by_user_id, File.created_at
+)
+_FILE_LIST_KEYS = tuple(column.key for column in _FILE_LIST_COLUMNS)
+
+
 async def list_files(
     db: AsyncSession,
     user_id: Optional[int] = None,
     admin_id: Optional[int] = None,
     skip: int = 0,
-    limit: int = 100
-) -> List[File]:
-    """List files with optional filtering"""
-    query = select(File)
-    
-    if user_id:
-        query = query.where(File.uploaded_by_user_id == user_id)
-    
-    if admin_id:
-        query = query.where(File.owner_admin_id == admin_id)
-    
-    query = query.offset(skip).limit(limit).order_by(File.created_at.desc())
-    
-    result = await db.execute(query)
-    return result.scalars().all()
+    limit: int = 100,
+    after_created_at: Optional[datetime] = None,
+    after_id: Optional[int] = None,
+    admin_ids: Optional[List[int]] = None,
+    member_user_id: Optional[int] = None
+) -> Tuple[List[dict], int]:
+    """
+    List files with optional filtering, newest first, plus the matching total
+    
+    Files come back as plain dicts of the FileResponse columns (no ORM
+    objects), ready to be serialized as they are.
+    admin_ids restricts the listing to files owned by any of those admins,
+    member_user_id to files of the admins that user is associated with.
+    Pass the created_at/id of the last file of the previous page as
+    after_created_at/after_id to seek past it instead of using skip; the
+    total then counts the files after the cursor.
+    """
+    criteria = _file_filters(user_id, admin_id, admin_ids, member_user_id, after_created_at, after_id)
+    # The window count is evaluated before OFFSET/LIMIT, so one query
+    # returns the page and the total
+    query = select(*_FILE_LIST_COLUMNS, func.count().over().label('total')).where(*criteria)
+    query = query.order_by(File.created_at.desc(), File.id.desc()).offset(skip).limit(limit)
+    
+    rows = (await db.execute(query)).mappings().all()
+    if rows:
+        return [{key: row[key] for key in _FILE_LIST_KEYS} for row in rows], rows[0]['total']
+    
+    # A page past the end carries no window row to read the total from
+    if skip or after_created_at is not None or after_id is not None:
+        total = await count_files(
+            db, user_id, admin_id, admin_ids, member_user_id, after_created_at, after_id
+        )
+    else:
+        total = 0
+    return [], total
+
+
+async def count_files(
+    db: AsyncSession,
+    user_id: Optional[int] = None,
+    admin_id: Optional[int] = None,
+    admin_ids: Optional[List[int]] = None,
+    member_user_id: Optional[int] = None,
+    after_created_at: Optional[datetime] = None,
+    after_id: Optional[int] = None
+) -> int:
+    """Count all files matching the list_files filters and cursor (ignores skip/limit)"""
+    query = select(func.count()).select_from(File).where(
+        *_file_filters(user_id, admin_id, admin_ids, member_user_id, after_created_at, after_id)
+    )
+    return await db.scalar(query)
 
 
 async def delete_file(db: AsyncSession, file_id: int) -> bool:
-    """Delete file record"""
-    file = await get_file_by_id(db, file_id)
-    if not file:
-        return False
-    
-    await db.delete(file)
+    """Delete file record (comments and their history go via ON DELETE CASCADE)"""
+    result = await db.execute(delete(File).where(File.id == file_id))
     await db.commit()
-    return True
+    return result.rowcount > 0
 
 
 # Comment CRUD
@@ -297,8 +522,7 @@ async def create_comment(db: AsyncSession, file_id: int, user_id: int, text: str
     """Create new comment"""
     comment = Comment(file_id=file_id, user_id=user_id, text=text)
     db.add(comment)
-    await db.commit()
-    await db.refresh(comment)
+    await db.flush()  # assigns comment.id without ending the transaction
     
     # Create history entry
     history = CommentHistory(
@@ -321,13 +545,25 @@ async def get_comment_by_id(db: AsyncSession, comment_id: int) -> Optional[Comme
 
 async def update_comment(db: AsyncSession, comment_id: int, text: str, user_id: int) -> Optional[Comment]:
     """Update comment"""
-    comment = await get_comment_by_id(db, comment_id)
-    if not comment:
+    # Join against a locked snapshot of the row so RETURNING yields the old text too
+    previous = (
+        select(Comment.id, Comment.text.label('previous_text'))
+        .where(Comment.id == comment_id)
+        .with_for_update()
+        .subquery()
+    )
+    result = await db.execute(
+        update(Comment)
+        .where(Comment.id == previous.c.id)
+        .values(text=text)
+        .returning(Comment, previous.c.previous_text)
+        .execution_options(synchronize_session='fetch')
+    )
+    row = result.one_or_none()
+    if not row:
         return None
     
-    previous_text = comment.text
-    comment.text = text
-    comment.updated_at = datetime.utcnow()
+    comment, previous_text = row
     
     # Create history entry
     history = CommentHistory(
@@ -340,35 +576,76 @@ async def update_comment(db: AsyncSession, comment_id: int, text: str, user_id:
     db.add(history)
     
     await db.commit()
-    await db.refresh(comment)
     return comment
 
 
 async def delete_comment(db: AsyncSession, comment_id: int, user_id: int) -> bool:
     """Delete comment"""
-    comment = await get_comment_by_id(db, comment_id)
-    if not comment:
-        return False
+    # comment_history rows go with the comment via ON DELETE CASCADE, so a
+    # 'deleted' entry would not outlive this statement
+    result = await db.execute(delete(Comment).where(Comment.id == comment_id))
+    await db.commit()
+    return result.rowcount > 0
+
+
+async def bulk_create_comments(db: AsyncSession, rows: List[dict]) -> List[int]:
+    """
+    Create many comments at once (imports, bulk moderation)
     
-    # Create history entry
-    history = CommentHistory(
-        comment_id=comment.id,
-        action='deleted',
-        previous_text=comment.text,
-        actor_user_id=user_id
+    Args:
+        rows: Dicts with file_id, user_id and text
+    
+    Returns:
+        IDs of the new comments, in the same order as rows
+    
+    Comments and their 'created' history entries are each sent as one
+    executemany, which SQLAlchemy's insertmanyvalues turns into batched
+    multi-row INSERT ... VALUES ... RETURNING statements on asyncpg.
+    """
+    if not rows:
+        return []
+    
+    result = await db.execute(
+        insert(Comment).returning(Comment.id, sort_by_parameter_order=True),
+        rows
     )
-    db.add(history)
+    comment_ids = list(result.scalars())
+    
+    await db.execute(insert(CommentHistory), [
+        {
+            'comment_id': comment_id,
+            'action': 'created',
+            'new_text': row['text'],
+            'actor_user_id': row['user_id']
+        }
+        for comment_id, row in zip(comment_ids, rows)
+    ])
     await db.commit()
+    return comment_ids
+
+
+async def bulk_append_history(db: AsyncSession, rows: List[dict]) -> None:
+    """
+    Append many comment history entries in one executemany
+    
+    Args:
+        rows: Dicts with comment_id, action, actor_user_id and optionally
+            previous_text/new_text
+    """
+    if not rows:
+        return
     
-    await db.delete(comment)
+    await db.execute(insert(CommentHistory), rows)
     await db.commit()
-    return True
 
 
 async def list_file_comments(db: AsyncSession, file_id: int) -> List[Comment]:
     """List comments for a file"""
     result = await db.execute(
-        select(Comment).where(Comment.file_id == file_id).order_by(Comment.created_at)
+        select(Comment)
+        .options(selectinload(Comment.user))
+        .where(Comment.file_id == file_id)
+        .order_by(Comment.created_at)
     )
     return result.scalars().all()
 
@@ -376,6 +653,9 @@ async def list_file_comments(db: AsyncSession, file_id: int) -> List[Comment]:
 async def get_comment_history(db: AsyncSession, comment_id: int) -> List[CommentHistory]:
     """Get history for a comment"""
     result = await db.execute(
-        select(CommentHistory).where(CommentHistory.comment_id == comment_id).order_by(CommentHistory.timestamp)
+        select(CommentHistory)
+        .options(selectinload(CommentHistory.actor))
+        .where(CommentHistory.comment_id == comment_id)
+        .order_by(CommentHistory.timestamp)
     )
     return result.scalars().all()
@@ -6,7 +6,17 @@ from app.config import settings
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=True,
-    future=True
+    future=True,
+    pool_pre_ping=True,
+    # Compiled-statement cache shared by all sessions (SQLAlchemy default: 500)
+    query_cache_size=1200,
+    # Rows per batched INSERT ... RETURNING for executemany-style inserts
+    insertmanyvalues_page_size=1000,
+    connect_args={
+        # asyncpg server-side prepared statements reused per connection
+        'statement_cache_size': 1024,
+        'prepared_statement_cache_size': 1024
+    }
 )
 
 # Create async session factory
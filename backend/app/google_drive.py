@@ -1,32 +1,314 @@
-import json
 import io
-from typing import Optional, Tuple
+import os
+import base64
+import asyncio
+import functools
+import hashlib
+import random
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, BinaryIO, Optional, Tuple, Union
+import httplib2
+import orjson
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from google.auth.exceptions import GoogleAuthError, RefreshError
 from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload, MediaIoBaseDownload
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.http import MediaInMemoryUpload, MediaIoBaseUpload, MediaIoBaseDownload
 from googleapiclient.errors import HttpError
 
 from app.config import settings
 
 
+# Drive v3 discovery document bundled with googleapiclient, parsed once per
+# process instead of on every client build
+_DRIVE_DISCOVERY_DOC = orjson.loads(get_static_doc('drive', 'v3'))
+
+# One Fernet per process; every GoogleDriveService shares it
+_ENCRYPTION_KEY = settings.ENCRYPTION_KEY.encode() if isinstance(settings.ENCRYPTION_KEY, str) else settings.ENCRYPTION_KEY
+_fernet = Fernet(_ENCRYPTION_KEY)
+
+# Credentials are sealed with AES-256-GCM (one AEAD pass) under a key derived
+# from ENCRYPTION_KEY; blobs without the prefix are older Fernet tokens
+_AESGCM_PREFIX = 'v2:'
+_AESGCM_NONCE_SIZE = 12
+_aesgcm = AESGCM(HKDF(
+    algorithm=hashes.SHA256(),
+    length=32,
+    salt=None,
+    info=b'archivos drive credentials'
+).derive(_ENCRYPTION_KEY))
+
+# OAuth scopes requested for every Service Account client
+_DRIVE_SCOPES = (
+    'https://www.googleapis.com/auth/drive.file',
+    'https://www.googleapis.com/auth/drive'
+)
+
+# Keys validate_credentials needs before it tries to parse the private key
+_REQUIRED_CREDENTIAL_KEYS = frozenset({'type', 'project_id', 'private_key', 'client_email', 'token_uri'})
+
+# Folder structure created by create_folder_structure
+_INITIAL_FOLDERS = (
+    'Pendientes',
+    'En Revisión',
+    'Aprobados',
+    'Rechazados',
+    'Archivados'
+)
+
+# MIME type Drive reports for folders
+_FOLDER_MIME = 'application/vnd.google-apps.folder'
+
+# Uploads below this size are sent as a single multipart request
+RESUMABLE_UPLOAD_THRESHOLD = 5 * 1024 * 1024
+
+# Bytes sent per request in a resumable upload (multiple of 256 KiB)
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Bytes fetched per request when streaming a download
+DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Ranged requests kept in flight once a download spans several chunks
+DOWNLOAD_CONCURRENCY = 4
+
+# Drive responses worth retrying, and how hard to try
+_RETRYABLE_STATUSES = frozenset((429, 500, 502, 503, 504))
+# Rate limiting rejects a request before Drive acts on it, so even creates can retry it
+_RATE_LIMITED_STATUSES = frozenset((429,))
+DRIVE_MAX_ATTEMPTS = 5
+DRIVE_BACKOFF_INITIAL = 1.0
+DRIVE_BACKOFF_MAX = 32.0
+
+# Drive calls in flight per Service Account (Drive allows ~10 writes/user/sec)
+DRIVE_CONCURRENCY_PER_ACCOUNT = 10
+
+# Worker threads reserved for blocking googleapiclient calls
+DRIVE_POOL_SIZE = 32
+
+# Seconds a decrypted Service Account key is kept in memory for reuse
+CREDENTIALS_CACHE_TTL = 300
+
+_thread_local = threading.local()
+
+# Drive I/O gets its own pool so slow Drive calls can't starve the default
+# executor that Starlette and the CPU-bound helpers share
+_DRIVE_POOL = ThreadPoolExecutor(max_workers=DRIVE_POOL_SIZE, thread_name_prefix='drive')
+
+
+def _thread_http() -> httplib2.Http:
+    """Keep-alive connection pool owned by the calling thread (httplib2 is not thread-safe)"""
+    http = getattr(_thread_local, 'http', None)
+    if http is None:
+        http = _thread_local.http = httplib2.Http(timeout=60)
+    return http
+
+
+class _ThreadLocalHttp:
+    """httplib2.Http stand-in that sends each request over the executing thread's pool"""
+    
+    def request(self, *args, **kwargs):
+        return _thread_http().request(*args, **kwargs)
+    
+    def __getattr__(self, name):
+        return getattr(_thread_http(), name)
+
+
+class _SharedTokenHttp(AuthorizedHttp):
+    """
+    AuthorizedHttp for credentials shared by every thread using a cached client
+    
+    The access token lives as long as the cached credentials; when it is
+    missing or about to expire, one thread refreshes it while concurrent
+    requests wait and reuse the new token instead of each signing a JWT and
+    POSTing to the token endpoint.
+    """
+    
+    def __init__(self, credentials, http):
+        super().__init__(credentials, http=http)
+        self._refresh_lock = threading.Lock()
+    
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        if not self.credentials.valid:
+            with self._refresh_lock:
+                # Another thread may have refreshed while this one waited
+                if not self.credentials.valid:
+                    self.credentials.refresh(self._request)
+        return super().request(uri, method, body=body, headers=headers, **kwargs)
+
+
+async def _run_blocking(func, *args, **kwargs):
+    """Run a blocking googleapiclient call on the Drive pool without stalling the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_DRIVE_POOL, functools.partial(func, *args, **kwargs))
+
+
+def _retry_delay(error: HttpError, attempt: int) -> float:
+    """Seconds to wait before retrying: Drive's Retry-After if given, else jittered backoff"""
+    retry_after = error.resp.get('retry-after')
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), DRIVE_BACKOFF_MAX)
+        except ValueError:
+            # HTTP-date form; fall back to backoff
+            pass
+    backoff = min(DRIVE_BACKOFF_INITIAL * 2 ** attempt, DRIVE_BACKOFF_MAX)
+    return backoff / 2 + random.uniform(0, backoff / 2)
+
+
+class _LRUCache:
+    """Small thread-safe LRU keyed by a digest of the encrypted credentials"""
+    
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        # Seconds an entry stays usable after it is stored (None: until evicted)
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key_for(encrypted_creds: str) -> bytes:
+        # Fixed-size key so the cache does not hold on to the ciphertext itself
+        return hashlib.blake2b(encrypted_creds.encode(), digest_size=16).digest()
+    
+    def get(self, key: bytes):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def put(self, key: bytes, value) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def pop(self, key: bytes) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
 class GoogleDriveService:
     """Service for interacting with Google Drive API"""
     
     def __init__(self):
-        self.encryption_key = settings.ENCRYPTION_KEY.encode() if isinstance(settings.ENCRYPTION_KEY, str) else settings.ENCRYPTION_KEY
-        self.fernet = Fernet(self.encryption_key)
+        self.encryption_key = _ENCRYPTION_KEY
+        self.fernet = _fernet
+        # Decrypted dicts and (credentials, service) pairs per encrypted blob;
+        # plaintext keys are only held for CREDENTIALS_CACHE_TTL
+        self._decrypted_cache = _LRUCache(maxsize=128, ttl=CREDENTIALS_CACHE_TTL)
+        self._service_cache = _LRUCache(maxsize=128)
+        # Per Service Account limit on concurrent Drive calls; a semaphore is
+        # only dropped once no call holds or waits on it, so the limit holds
+        self._account_limits = weakref.WeakValueDictionary()
     
     def encrypt_credentials(self, credentials_dict: dict) -> str:
         """Encrypt credentials for storage"""
-        credentials_json = json.dumps(credentials_dict)
-        encrypted = self.fernet.encrypt(credentials_json.encode())
-        return encrypted.decode()
+        nonce = os.urandom(_AESGCM_NONCE_SIZE)
+        sealed = nonce + _aesgcm.encrypt(nonce, orjson.dumps(credentials_dict), None)
+        return _AESGCM_PREFIX + base64.urlsafe_b64encode(sealed).decode()
     
     def decrypt_credentials(self, encrypted_creds: str) -> dict:
         """Decrypt stored credentials"""
-        decrypted = self.fernet.decrypt(encrypted_creds.encode())
-        return json.loads(decrypted.decode())
+        key = _LRUCache.key_for(encrypted_creds)
+        credentials_dict = self._decrypted_cache.get(key)
+        if credentials_dict is None:
+            if encrypted_creds.startswith(_AESGCM_PREFIX):
+                sealed = base64.urlsafe_b64decode(encrypted_creds[len(_AESGCM_PREFIX):])
+                decrypted = _aesgcm.decrypt(sealed[:_AESGCM_NONCE_SIZE], sealed[_AESGCM_NONCE_SIZE:], None)
+            else:
+                decrypted = self.fernet.decrypt(encrypted_creds.encode())
+            credentials_dict = orjson.loads(decrypted)
+            self._decrypted_cache.put(key, credentials_dict)
+        # Callers get their own copy so the cached dict cannot be mutated
+        return dict(credentials_dict)
+    
+    def invalidate_credentials(self, encrypted_creds: str) -> None:
+        """Drop the cached decrypted credentials and Drive client for a blob"""
+        key = _LRUCache.key_for(encrypted_creds)
+        self._decrypted_cache.pop(key)
+        self._service_cache.pop(key)
+    
+    def _handle_http_error(self, error: HttpError, encrypted_creds: str) -> None:
+        """Evict cached clients whose credentials Google rejected"""
+        if error.resp.status in (401, 403):
+            self.invalidate_credentials(encrypted_creds)
+    
+    async def _call_drive(self, encrypted_creds: str, func, *args, idempotent: bool = True, **kwargs):
+        """
+        Run a blocking Drive call off the event loop, throttled per account
+        
+        429 and 5xx responses are retried up to DRIVE_MAX_ATTEMPTS times,
+        waiting as long as Drive's Retry-After asks or with jittered
+        exponential backoff. The wait happens outside the account's slot.
+        
+        Args:
+            encrypted_creds: Encrypted Service Account credentials used by the call
+            func: Blocking callable, e.g. a request's execute
+            idempotent: False for calls that create something (files().create);
+                those are only retried on 429, since a 5xx may come back after
+                Drive already committed the create
+        
+        Returns:
+            Whatever func returns
+        """
+        key = _LRUCache.key_for(encrypted_creds)
+        limit = self._account_limits.get(key)
+        if limit is None:
+            limit = self._account_limits[key] = asyncio.Semaphore(DRIVE_CONCURRENCY_PER_ACCOUNT)
+        
+        retryable = _RETRYABLE_STATUSES if idempotent else _RATE_LIMITED_STATUSES
+        for attempt in range(DRIVE_MAX_ATTEMPTS):
+            try:
+                async with limit:
+                    return await _run_blocking(func, *args, **kwargs)
+            except HttpError as e:
+                if e.resp.status not in retryable or attempt == DRIVE_MAX_ATTEMPTS - 1:
+                    raise
+                await asyncio.sleep(_retry_delay(e, attempt))
+    
+    def _build_from_dict(self, credentials_dict: dict) -> tuple:
+        """
+        Build Service Account credentials and a Drive client (uncached)
+        
+        Args:
+            credentials_dict: Service Account credentials dictionary
+        
+        Returns:
+            Tuple of (credentials, Google Drive service object)
+        """
+        try:
+            credentials = service_account.Credentials.from_service_account_info(
+                credentials_dict,
+                scopes=_DRIVE_SCOPES
+            )
+            # Requests are built on the event loop but executed in worker
+            # threads, so the connection is resolved per call, not per service
+            service = build_from_document(
+                _DRIVE_DISCOVERY_DOC,
+                http=_SharedTokenHttp(credentials, http=_ThreadLocalHttp())
+            )
+        except (ValueError, GoogleAuthError) as e:
+            # Malformed dict or private key; callers tell this apart from Drive errors
+            raise ValueError(f"Error creating service account credentials: {str(e)}") from e
+        
+        return credentials, service
     
     def get_drive_service(self, encrypted_creds: str):
         """
@@ -41,24 +323,20 @@ class GoogleDriveService:
         if not encrypted_creds:
             raise Exception("No credentials provided")
         
-        credentials_dict = self.decrypt_credentials(encrypted_creds)
+        # Parsing the private key and building the client is the expensive
+        # part, so reuse the pair built for the same encrypted blob
+        key = _LRUCache.key_for(encrypted_creds)
+        cached = self._service_cache.get(key)
+        if cached is not None:
+            return cached[1]
         
-        try:
-            credentials = service_account.Credentials.from_service_account_info(
-                credentials_dict,
-                scopes=[
-                    'https://www.googleapis.com/auth/drive.file',
-                    'https://www.googleapis.com/auth/drive'
-                ]
-            )
-            service = build('drive', 'v3', credentials=credentials)
-            return service
-        except Exception as e:
-            raise Exception(f"Error creating service account credentials: {str(e)}")
+        credentials, service = self._build_from_dict(self.decrypt_credentials(encrypted_creds))
+        self._service_cache.put(key, (credentials, service))
+        return service
     
     async def upload_file(
         self,
-        file_content: bytes,
+        file_content: Union[bytes, BinaryIO],
         filename: str,
         mime_type: str,
         encrypted_creds: str,
@@ -68,7 +346,8 @@ class GoogleDriveService:
         Upload a file to Google Drive
         
         Args:
-            file_content: File content as bytes
+            file_content: File content as bytes, or a seekable binary file
+                object (e.g. UploadFile.file) that is streamed without copying
             filename: Name of the file
             mime_type: MIME type of the file
             encrypted_creds: Encrypted Service Account credentials
@@ -84,58 +363,140 @@ class GoogleDriveService:
             if folder_id:
                 file_metadata['parents'] = [folder_id]
             
-            media = MediaIoBaseUpload(
-                io.BytesIO(file_content),
-                mimetype=mime_type,
-                resumable=True
-            )
+            # Small payloads go up in one multipart request; a resumable
+            # session only pays off when there is enough data to chunk
+            if isinstance(file_content, bytes):
+                # Keeps a reference to the payload instead of copying it
+                media = MediaInMemoryUpload(
+                    file_content,
+                    mimetype=mime_type,
+                    chunksize=UPLOAD_CHUNK_SIZE,
+                    resumable=len(file_content) >= RESUMABLE_UPLOAD_THRESHOLD
+                )
+            else:
+                content_size = file_content.seek(0, io.SEEK_END)
+                file_content.seek(0)
+                media = MediaIoBaseUpload(
+                    file_content,
+                    mimetype=mime_type,
+                    chunksize=UPLOAD_CHUNK_SIZE,
+                    resumable=content_size >= RESUMABLE_UPLOAD_THRESHOLD
+                )
             
-            file = service.files().create(
+            request = service.files().create(
                 body=file_metadata,
                 media_body=media,
                 fields='id, size'
-            ).execute()
+            )
+            
+            if media.resumable():
+                # Send one chunk per worker-thread call, so only a chunk of
+                # the file is in memory and a failed chunk is retried alone
+                # (resending a chunk into the same session cannot create a
+                # second file, so these stay retryable on 5xx)
+                file = None
+                while file is None:
+                    _, file = await self._call_drive(encrypted_creds, request.next_chunk)
+            else:
+                file = await self._call_drive(encrypted_creds, request.execute, idempotent=False)
             
             return file.get('id'), int(file.get('size', 0))
             
         except HttpError as e:
+            self._handle_http_error(e, encrypted_creds)
             raise Exception(f"Google Drive API error: {str(e)}")
         except Exception as e:
             raise Exception(f"Error uploading file: {str(e)}")
     
-    async def download_file(
+    @staticmethod
+    def _fetch_range(service, file_id: str, start: int, end: int) -> bytes:
+        """Fetch bytes start..end (inclusive) of a Drive file with one ranged GET"""
+        request = service.files().get_media(fileId=file_id)
+        request.headers['range'] = f'bytes={start}-{end}'
+        return request.execute()
+    
+    async def iter_download(
         self,
         file_id: str,
-        encrypted_creds: str
-    ) -> bytes:
+        encrypted_creds: str,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
         """
-        Download a file from Google Drive
+        Stream a file from Google Drive chunk by chunk
+        
+        The first chunk also reports the file size; the rest of the file is
+        then fetched with up to DOWNLOAD_CONCURRENCY ranged GETs in flight,
+        still yielded in order.
         
         Args:
             file_id: Google Drive file ID
             encrypted_creds: Encrypted Service Account credentials
+            chunk_size: Maximum bytes fetched (and yielded) per request
         
-        Returns:
-            File content as bytes
+        Yields:
+            Consecutive chunks of the file content
         """
+        window = deque()
         try:
             service = self.get_drive_service(encrypted_creds)
             
             request = service.files().get_media(fileId=file_id)
-            file_buffer = io.BytesIO()
-            downloader = MediaIoBaseDownload(file_buffer, request)
+            chunk_buffer = io.BytesIO()
+            downloader = MediaIoBaseDownload(chunk_buffer, request, chunksize=chunk_size)
+            
+            status, done = await self._call_drive(encrypted_creds, downloader.next_chunk)
+            yield chunk_buffer.getvalue()
+            if done:
+                return
+            
+            # Keep a bounded window of ranged requests running ahead of the
+            # consumer, so memory stays at DOWNLOAD_CONCURRENCY chunks
+            ranges = (
+                (start, min(start + chunk_size, status.total_size) - 1)
+                for start in range(status.resumable_progress, status.total_size, chunk_size)
+            )
             
-            done = False
-            while not done:
-                status, done = downloader.next_chunk()
+            def schedule_next():
+                next_range = next(ranges, None)
+                if next_range is not None:
+                    window.append(asyncio.ensure_future(
+                        self._call_drive(encrypted_creds, self._fetch_range, service, file_id, *next_range)
+                    ))
             
-            file_buffer.seek(0)
-            return file_buffer.read()
+            for _ in range(DOWNLOAD_CONCURRENCY):
+                schedule_next()
+            
+            while window:
+                chunk = await window.popleft()
+                schedule_next()
+                yield chunk
             
         except HttpError as e:
+            self._handle_http_error(e, encrypted_creds)
             raise Exception(f"Google Drive API error: {str(e)}")
         except Exception as e:
             raise Exception(f"Error downloading file: {str(e)}")
+        finally:
+            # Stop waiting on ranges nobody will read (error or client went away)
+            for pending in window:
+                pending.cancel()
+    
+    async def download_file(
+        self,
+        file_id: str,
+        encrypted_creds: str
+    ) -> bytes:
+        """
+        Download a whole file from Google Drive (prefer iter_download for large files)
+        
+        Args:
+            file_id: Google Drive file ID
+            encrypted_creds: Encrypted Service Account credentials
+        
+        Returns:
+            File content as bytes
+        """
+        return b''.join([chunk async for chunk in self.iter_download(file_id, encrypted_creds)])
     
     async def delete_file(
         self,
@@ -154,10 +515,11 @@ class GoogleDriveService:
         """
         try:
             service = self.get_drive_service(encrypted_creds)
-            service.files().delete(fileId=file_id).execute()
+            await self._call_drive(encrypted_creds, service.files().delete(fileId=file_id).execute)
             return True
             
         except HttpError as e:
+            self._handle_http_error(e, encrypted_creds)
             raise Exception(f"Google Drive API error: {str(e)}")
         except Exception as e:
             raise Exception(f"Error deleting file: {str(e)}")
@@ -179,18 +541,19 @@ class GoogleDriveService:
         """
         try:
             service = self.get_drive_service(encrypted_creds)
-            file = service.files().get(
+            file = await self._call_drive(encrypted_creds, service.files().get(
                 fileId=file_id,
                 fields='id, name, mimeType, size, createdTime, modifiedTime'
-            ).execute()
+            ).execute)
             return file
             
         except HttpError as e:
+            self._handle_http_error(e, encrypted_creds)
             raise Exception(f"Google Drive API error: {str(e)}")
         except Exception as e:
             raise Exception(f"Error getting file metadata: {str(e)}")
     
-    def validate_credentials(self, credentials_dict: dict) -> bool:
+    async def validate_credentials(self, credentials_dict: dict) -> bool:
         """
         Validate Service Account credentials by attempting to create a service
         
@@ -198,21 +561,46 @@ class GoogleDriveService:
             credentials_dict: Service Account credentials dictionary
         
         Returns:
-            True if valid
+            True if valid, False if the credentials are malformed or Google
+            rejects them
+        
+        Raises:
+            HttpError: Drive failed for another reason (429/5xx after retries)
         """
+        # Obviously incomplete dicts fail without any PEM parsing
+        if not _REQUIRED_CREDENTIAL_KEYS.issubset(credentials_dict):
+            return False
+        
         try:
-            encrypted = self.encrypt_credentials(credentials_dict)
-            service = self.get_drive_service(encrypted)
-            # Try to list files to validate
-            service.files().list(pageSize=1).execute()
-            return True
-        except Exception:
+            # Build straight from the dict: no encrypt/decrypt round-trip and
+            # no cache entry for credentials that may turn out to be invalid
+            _, service = self._build_from_dict(credentials_dict)
+        except ValueError:
             return False
+        
+        try:
+            # Try to list files to validate (ids only, smallest response).
+            # Nothing is stored yet, so the account's client_email stands in
+            # for the encrypted blob as the concurrency key
+            await self._call_drive(credentials_dict['client_email'], service.files().list(
+                pageSize=1, q='trashed=false', fields='files(id)'
+            ).execute)
+        except RefreshError:
+            # Google would not issue a token for this key (revoked, deleted account)
+            return False
+        except HttpError as e:
+            # Only an auth rejection says anything about the credentials;
+            # transient errors have already been retried by _call_drive
+            if e.resp.status in (401, 403):
+                return False
+            raise
+        return True
     
-    def list_folder_contents(
+    async def list_folder_contents(
         self,
         folder_id: str,
-        encrypted_creds: str
+        encrypted_creds: str,
+        include_icon_link: bool = False
     ) -> list:
         """
         List all files and folders inside a specific folder
@@ -220,6 +608,7 @@ class GoogleDriveService:
         Args:
             folder_id: Google Drive folder ID
             encrypted_creds: Encrypted Service Account credentials
+            include_icon_link: Also fetch iconLink (extra work on Drive's side)
         
         Returns:
             List of files/folders with metadata
@@ -227,39 +616,43 @@ class GoogleDriveService:
         try:
             service = self.get_drive_service(encrypted_creds)
             
+            file_fields = "id, name, mimeType, size, createdTime, modifiedTime"
+            if include_icon_link:
+                file_fields += ", iconLink"
+            
             query = f"'{folder_id}' in parents and trashed=false"
-            results = service.files().list(
+            files_resource = service.files()
+            request = files_resource.list(
                 q=query,
-                pageSize=100,
-                fields="files(id, name, mimeType, size, createdTime, modifiedTime, iconLink)",
+                pageSize=1000,  # Drive's maximum page size
+                fields=f"nextPageToken, files({file_fields})",
                 orderBy="folder,name"
-            ).execute()
+            )
             
-            files = results.get('files', [])
+            # Follow nextPageToken so large folders are not truncated
+            files = []
+            while request is not None:
+                results = await self._call_drive(encrypted_creds, request.execute)
+                files.extend(results.get('files', []))
+                request = files_resource.list_next(request, results)
             
-            # Format response
-            formatted_files = []
+            # Format response: `fields` already limits Drive's dicts to the keys
+            # we return, so complete them in place instead of copying each one
             for file in files:
-                is_folder = file['mimeType'] == 'application/vnd.google-apps.folder'
-                formatted_files.append({
-                    'id': file['id'],
-                    'name': file['name'],
-                    'mimeType': file['mimeType'],
-                    'isFolder': is_folder,
-                    'size': file.get('size', '0') if not is_folder else None,
-                    'createdTime': file['createdTime'],
-                    'modifiedTime': file['modifiedTime'],
-                    'iconLink': file.get('iconLink', '')
-                })
+                is_folder = file['mimeType'] == _FOLDER_MIME
+                file['isFolder'] = is_folder
+                file['size'] = None if is_folder else file.get('size', '0')
+                file.setdefault('iconLink', '')
             
-            return formatted_files
+            return files
             
         except HttpError as e:
+            self._handle_http_error(e, encrypted_creds)
             raise Exception(f"Google Drive API error: {str(e)}")
         except Exception as e:
             raise Exception(f"Error listing folder contents: {str(e)}")
     
-    def create_folder_structure(
+    async def create_folder_structure(
         self,
         parent_folder_id: str,
         encrypted_creds: str
@@ -277,29 +670,26 @@ class GoogleDriveService:
         try:
             service = self.get_drive_service(encrypted_creds)
             
-            # Define folder structure
-            folders = [
-                'Pendientes',
-                'En Revisión',
-                'Aprobados',
-                'Rechazados',
-                'Archivados'
+            # The folders are independent, so create them concurrently (one
+            # round-trip of wall time instead of five)
+            requests = [
+                service.files().create(
+                    body={
+                        'name': folder_name,
+                        'mimeType': _FOLDER_MIME,
+                        'parents': [parent_folder_id]
+                    },
+                    fields='id, name'
+                )
+                for folder_name in _INITIAL_FOLDERS
             ]
+            results = await asyncio.gather(
+                *(self._call_drive(encrypted_creds, request.execute, idempotent=False) for request in requests)
+            )
             
             created_folders = {}
             
-            for folder_name in folders:
-                file_metadata = {
-                    'name': folder_name,
-                    'mimeType': 'application/vnd.google-apps.folder',
-                    'parents': [parent_folder_id]
-                }
-                
-                folder = service.files().create(
-                    body=file_metadata,
-                    fields='id, name'
-                ).execute()
-                
+            for folder_name, folder in zip(_INITIAL_FOLDERS, results):
                 created_folders[folder_name] = {
                     'id': folder['id'],
                     'name': folder['name']
@@ -308,6 +698,7 @@ class GoogleDriveService:
             return created_folders
             
         except HttpError as e:
+            self._handle_http_error(e, encrypted_creds)
             raise Exception(f"Google Drive API error: {str(e)}")
         except Exception as e:
             raise Exception(f"Error creating folder structure: {str(e)}")
@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
@@ -21,7 +22,9 @@ app = FastAPI(
     title="DocManager Drive",
     description="Document Management System with Google Drive Integration",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # Responses are serialized with orjson instead of the stdlib json encoder
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -1,6 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum, Table
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum, Table, Index, func
 from sqlalchemy.orm import relationship
-from datetime import datetime
 import enum
 from app.db import Base
 
@@ -11,31 +10,42 @@ class RoleEnum(str, enum.Enum):
     SUPERADMIN = "superadmin"
 
 
+# Database labels for RoleEnum, computed once
+_ROLE_VALUES = [role.value for role in RoleEnum]
+
+
+def utcnow():
+    """Server-side naive UTC timestamp, filled in by PostgreSQL"""
+    return func.timezone('utc', func.now())
+
+
 # Association table for many-to-many relationship between users and admins
 user_admins = Table(
     'user_admins',
     Base.metadata,
     Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
-    Column('admin_id', Integer, ForeignKey('admins.id', ondelete='CASCADE'), primary_key=True),
-    Column('created_at', DateTime, default=datetime.utcnow)
+    Column('admin_id', Integer, ForeignKey('admins.id', ondelete='CASCADE'), primary_key=True, index=True),
+    Column('created_at', DateTime, server_default=utcnow())
 )
 
 
 class User(Base):
     __tablename__ = "users"
+    # Load server-generated timestamps back via RETURNING on INSERT/UPDATE
+    __mapper_args__ = {"eager_defaults": True}
 
-    id = Column(Integer, primary_key=True, index=True)
-    email = Column(String, unique=True, index=True, nullable=False)
+    id = Column(Integer, primary_key=True)
+    email = Column(String, nullable=False)
     password_hash = Column(String, nullable=False)
-    role = Column(Enum(RoleEnum, values_callable=lambda x: [e.value for e in x]), default=RoleEnum.USER, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    role = Column(Enum(RoleEnum, values_callable=lambda _: _ROLE_VALUES), default=RoleEnum.USER, nullable=False)
+    created_at = Column(DateTime, server_default=utcnow())
+    updated_at = Column(DateTime, server_default=utcnow(), onupdate=utcnow())
 
     # Relationships
     admin_profile = relationship("Admin", back_populates="user", uselist=False, cascade="all, delete-orphan")
-    uploaded_files = relationship("File", back_populates="uploader", foreign_keys="File.uploaded_by_user_id")
+    uploaded_files = relationship("File", back_populates="uploader")
     comments = relationship("Comment", back_populates="user", cascade="all, delete-orphan")
-    comment_actions = relationship("CommentHistory", back_populates="actor", foreign_keys="CommentHistory.actor_user_id")
+    comment_actions = relationship("CommentHistory", back_populates="actor")
     
     # Many-to-many with admins
     assigned_admins = relationship(
@@ -44,11 +54,20 @@ class User(Base):
         back_populates="assigned_users"
     )
 
+    __table_args__ = (
+        # Unique lookup for login; INCLUDEs the remaining columns for Index-Only Scans
+        Index(
+            'ix_users_email_covering', email, unique=True,
+            postgresql_include=['id', 'password_hash', 'role', 'created_at', 'updated_at']
+        ),
+    )
+
 
 class Admin(Base):
     __tablename__ = "admins"
+    __mapper_args__ = {"eager_defaults": True}
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)  # Link to User (admin/superadmin)
     name = Column(String, nullable=False)
     encrypted_drive_cred = Column(Text, nullable=True)  # Encrypted JSON with Service Account credentials
@@ -61,8 +80,8 @@ class Admin(Base):
     folder_rechazados_id = Column(String, nullable=True)
     folder_archivados_id = Column(String, nullable=True)
     
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utcnow())
+    updated_at = Column(DateTime, server_default=utcnow(), onupdate=utcnow())
 
     # Relationships
     user = relationship("User", back_populates="admin_profile")
@@ -78,54 +97,78 @@ class Admin(Base):
 
 class File(Base):
     __tablename__ = "files"
+    __mapper_args__ = {"eager_defaults": True}
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     filename = Column(String, nullable=False)
     original_filename = Column(String, nullable=False)
-    drive_file_id = Column(String, nullable=True, index=True)  # Google Drive file ID
+    drive_file_id = Column(String, nullable=True)  # Google Drive file ID
     mime_type = Column(String, nullable=True)
     file_size = Column(Integer, nullable=True)
     
     owner_admin_id = Column(Integer, ForeignKey("admins.id"), nullable=False)
-    uploaded_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    uploaded_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     
     description = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utcnow())
+    updated_at = Column(DateTime, server_default=utcnow(), onupdate=utcnow())
 
     # Relationships
     owner_admin = relationship("Admin", back_populates="files")
     uploader = relationship("User", back_populates="uploaded_files", foreign_keys=[uploaded_by_user_id])
     comments = relationship("Comment", back_populates="file", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Serves list_files(admin_id=...) ordered by newest first
+        Index('ix_files_owner_created', owner_admin_id, created_at.desc()),
+        # Drive IDs are only ever matched exactly, so a hash index is enough;
+        # rows without a Drive ID yet are left out of it
+        Index(
+            'ix_files_drive_file_id', drive_file_id,
+            postgresql_using='hash', postgresql_where=drive_file_id.isnot(None)
+        ),
+    )
+
 
 class Comment(Base):
     __tablename__ = "comments"
+    __mapper_args__ = {"eager_defaults": True}
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     file_id = Column(Integer, ForeignKey("files.id", ondelete='CASCADE'), nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete='CASCADE'), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete='CASCADE'), nullable=False, index=True)
     text = Column(Text, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utcnow())
+    updated_at = Column(DateTime, server_default=utcnow(), onupdate=utcnow())
 
     # Relationships
     file = relationship("File", back_populates="comments")
     user = relationship("User", back_populates="comments")
     history = relationship("CommentHistory", back_populates="comment", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Serves list_file_comments ordered by created_at
+        Index('ix_comments_file_created', file_id, created_at),
+    )
+
 
 class CommentHistory(Base):
     __tablename__ = "comment_history"
+    __mapper_args__ = {"eager_defaults": True}
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     comment_id = Column(Integer, ForeignKey("comments.id", ondelete='CASCADE'), nullable=False)
     action = Column(String, nullable=False)  # 'created', 'edited', 'deleted'
     previous_text = Column(Text, nullable=True)
     new_text = Column(Text, nullable=True)
-    actor_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    actor_user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    timestamp = Column(DateTime, server_default=utcnow())
 
     # Relationships
     comment = relationship("Comment", back_populates="history")
     actor = relationship("User", back_populates="comment_actions", foreign_keys=[actor_user_id])
+
+    __table_args__ = (
+        # Serves get_comment_history ordered by timestamp
+        Index('ix_comment_history_comment_timestamp', comment_id, timestamp),
+    )
@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 import json
 
 from app.db import get_db
 from app.schemas import (
     AdminCreate, AdminResponse, AdminUpdate,
-    UserCreate, UserResponse, UserRoleUpdate
+    UserCreate, UserResponse, UserRoleUpdate, construct_from_orm, dump_from_orm
 )
 from app.auth import get_admin_user, get_superadmin_user
 from app import crud
@@ -17,32 +18,37 @@ router = APIRouter(prefix="/admin", tags=["Admin"])
 
 
 # Admin Management (for all admins)
-@router.get("/profile", response_model=AdminResponse)
+# Read endpoints return trusted rows via construct_from_orm (or, for lists,
+# orjson-serialized dicts); response_model=None keeps FastAPI from
+# validating them a second time
+@router.get("/profile", response_model=None, responses={200: {"model": AdminResponse}})
 async def get_admin_profile(
     current_user: User = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get admin profile based on user email"""
-    admin = await crud.get_admin_by_email(db, current_user.email)
+    """Get the current user's admin profile"""
+    # Loaded together with the user by get_current_user
+    admin = current_user.admin_profile
     if not admin:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Admin profile not found. Please contact superadmin."
         )
-    return admin
+    return construct_from_orm(AdminResponse, admin)
 
 
 # Superadmin only endpoints
-@router.get("/all", response_model=List[AdminResponse])
+@router.get("/all", response_model=None, responses={200: {"model": List[AdminResponse]}})
 async def list_all_admins(
     skip: int = 0,
     limit: int = 100,
+    after_id: Optional[int] = None,
     current_user: User = Depends(get_superadmin_user),
     db: AsyncSession = Depends(get_db)
 ):
     """List all admins (superadmin only)"""
-    admins = await crud.list_admins(db, skip=skip, limit=limit)
-    return admins
+    admins = await crud.list_admins(db, skip=skip, limit=limit, after_id=after_id)
+    return ORJSONResponse([dump_from_orm(AdminResponse, admin) for admin in admins])
 
 
 @router.post("/create", response_model=AdminResponse, status_code=status.HTTP_201_CREATED)
@@ -52,34 +58,29 @@ async def create_admin(
     db: AsyncSession = Depends(get_db)
 ):
     """Create new admin (superadmin only)"""
-    # Check if admin already exists
-    existing_admin = await crud.get_admin_by_email(db, admin_data.email)
+    # One lookup tells whether the user exists and whether they are already an admin
+    user, existing_admin = await crud.get_user_with_admin_by_email(db, admin_data.email)
     if existing_admin:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Admin with this email already exists"
         )
     
-    # Create admin
+    # Create admin profile, creating the user with a temporary password
+    # (they should change it) or promoting the existing one
     admin = await crud.create_admin(
         db,
+        email=admin_data.email,
         name=admin_data.name,
-        email=admin_data.email
+        password="ChangeMe123!",
+        user_id=user.id if user else None
     )
-    
-    # Also create corresponding user with admin role if doesn't exist
-    user = await crud.get_user_by_email(db, admin_data.email)
-    if not user:
-        # Create user with temporary password (they should change it)
-        await crud.create_user(
-            db,
-            email=admin_data.email,
-            password="ChangeMe123!",
-            role=RoleEnum.ADMIN
+    if admin is None:
+        # Someone else gave this user a profile after the lookup above
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Admin with this email already exists"
         )
-    else:
-        # Update existing user to admin role
-        await crud.update_user(db, user.id, role=RoleEnum.ADMIN)
     
     return admin
 
@@ -128,8 +129,7 @@ async def create_user_as_admin(
 ):
     """Create new user (admin or superadmin only)"""
     # Check if user already exists
-    existing_user = await crud.get_user_by_email(db, user_data.email)
-    if existing_user:
+    if await crud.user_email_exists(db, user_data.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User already exists"
@@ -153,16 +153,17 @@ async def create_user_as_admin(
     return user
 
 
-@router.get("/audit/users", response_model=List[UserResponse])
+@router.get("/audit/users", response_model=None, responses={200: {"model": List[UserResponse]}})
 async def audit_all_users(
     skip: int = 0,
     limit: int = 100,
+    after_id: Optional[int] = None,
     current_user: User = Depends(get_superadmin_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Get all users for audit (superadmin only)"""
-    users = await crud.list_users(db, skip=skip, limit=limit)
-    return users
+    users = await crud.list_users(db, skip=skip, limit=limit, after_id=after_id)
+    return ORJSONResponse([dump_from_orm(UserResponse, user) for user in users])
 
 
 @router.put("/users/{user_id}/role", response_model=UserResponse)
@@ -173,32 +174,19 @@ async def update_user_role(
     db: AsyncSession = Depends(get_db)
 ):
     """Update user role (superadmin only)"""
-    # Get user by ID
-    user = await crud.get_user_by_id(db, user_id)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
     # Prevent changing own role
-    if user.id == current_user.id:
+    if user_id == current_user.id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot change your own role"
         )
     
-    # Update role
-    updated_user = await crud.update_user(db, user_id, role=role_update.role)
-    
-    # If promoting to admin/superadmin, create admin profile if doesn't exist
-    if role_update.role in [RoleEnum.ADMIN, RoleEnum.SUPERADMIN]:
-        admin = await crud.get_admin_by_user_id(db, user_id)
-        if not admin:
-            await crud.create_admin_profile(
-                db,
-                user_id=user_id,
-                name=user.email.split('@')[0].capitalize()
-            )
+    # Update role (and create the admin profile if promoting) in one transaction
+    updated_user = await crud.update_user_role(db, user_id, role_update.role)
+    if not updated_user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
     
     return updated_user
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import get_db
-from app.schemas import UserLogin, UserRegister, Token
+from app.schemas import UserLogin, UserRegister, Token, json_body, json_body_openapi
 from app.auth import create_access_token, verify_password
 from app import crud
 from app.models import RoleEnum
@@ -10,12 +10,14 @@ from app.models import RoleEnum
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
-@router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserRegister, db: AsyncSession = Depends(get_db)):
+@router.post(
+    "/register", response_model=Token, status_code=status.HTTP_201_CREATED,
+    openapi_extra=json_body_openapi(UserRegister)
+)
+async def register(user_data: UserRegister = Depends(json_body(UserRegister)), db: AsyncSession = Depends(get_db)):
     """Register a new user (normal users only)"""
     # Check if user already exists
-    existing_user = await crud.get_user_by_email(db, user_data.email)
-    if existing_user:
+    if await crud.user_email_exists(db, user_data.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
@@ -35,8 +37,8 @@ async def register(user_data: UserRegister, db: AsyncSession = Depends(get_db)):
     return Token(access_token=access_token)
 
 
-@router.post("/login", response_model=Token)
-async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
+@router.post("/login", response_model=Token, openapi_extra=json_body_openapi(UserLogin))
+async def login(credentials: UserLogin = Depends(json_body(UserLogin)), db: AsyncSession = Depends(get_db)):
     """Login and get JWT token"""
     # Get user
     user = await crud.get_user_by_email(db, credentials.email)
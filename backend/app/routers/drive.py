@@ -2,23 +2,54 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
-import json
+import asyncio
 
 from app.db import get_db
-from app.auth import get_current_user, require_role
-from app.models import User, RoleEnum
+from app.auth import get_admin_user
+from app.models import Admin, User
 from app import crud, schemas
 from app.config import settings
 from app.google_drive import drive_service
 
 router = APIRouter(prefix="/drive", tags=["Google Drive"])
 
+# Keys every Service Account key file must contain
+_REQUIRED_SA_FIELDS = frozenset({
+    'type', 'project_id', 'private_key_id', 'private_key',
+    'client_email', 'client_id', 'auth_uri', 'token_uri'
+})
 
-@router.post("/credentials", response_model=schemas.DriveCredentialsResponse)
+# Admin column that stores the Drive ID of each folder from create-structure
+_FOLDER_ID_COLUMNS = {
+    'Pendientes': 'folder_pendientes_id',
+    'En Revisión': 'folder_en_revision_id',
+    'Aprobados': 'folder_aprobados_id',
+    'Rechazados': 'folder_rechazados_id',
+    'Archivados': 'folder_archivados_id'
+}
+
+
+async def _client_email(admin: Admin) -> Optional[str]:
+    """Service Account email from the admin's stored credentials, if any"""
+    if not admin.encrypted_drive_cred:
+        return None
+    try:
+        # Decrypting is CPU-bound, keep it off the event loop
+        loop = asyncio.get_running_loop()
+        creds = await loop.run_in_executor(None, drive_service.decrypt_credentials, admin.encrypted_drive_cred)
+        return creds.get('client_email')
+    except Exception:
+        return None
+
+
+@router.post(
+    "/credentials", response_model=schemas.DriveCredentialsResponse,
+    openapi_extra=schemas.json_body_openapi(schemas.DriveCredentialsCreate)
+)
 async def set_drive_credentials(
-    credentials: schemas.DriveCredentialsCreate,
+    credentials: schemas.DriveCredentialsCreate = Depends(schemas.json_body(schemas.DriveCredentialsCreate)),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_admin_user)
 ):
     """
     Set Google Drive Service Account credentials for the current admin/superadmin user.
@@ -28,38 +59,27 @@ async def set_drive_credentials(
     
     The Service Account email must have access to the specified folder.
     """
-    # Check if user has admin or superadmin role
-    if current_user.role not in [RoleEnum.ADMIN, RoleEnum.SUPERADMIN]:
+    # Service Account JSON was already parsed (once) by the schema
+    credentials_data = credentials.credentials_data
+    if credentials_data is None:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only admins and superadmins can configure Google Drive"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid JSON format"
         )
     
-    # Validate and parse Service Account JSON
-    try:
-        credentials_data = json.loads(credentials.service_account_json)
-        
-        # Validate required Service Account fields
-        required_fields = ['type', 'project_id', 'private_key_id', 'private_key', 
-                          'client_email', 'client_id', 'auth_uri', 'token_uri']
-        missing_fields = [field for field in required_fields if field not in credentials_data]
-        
-        if missing_fields:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid Service Account JSON. Missing fields: {', '.join(missing_fields)}"
-            )
-        
-        if credentials_data.get('type') != 'service_account':
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="JSON file must be a Service Account key (type: 'service_account')"
-            )
-        
-    except json.JSONDecodeError:
+    # Validate required Service Account fields
+    missing_fields = _REQUIRED_SA_FIELDS.difference(credentials_data)
+    
+    if missing_fields:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid JSON format"
+            detail=f"Invalid Service Account JSON. Missing fields: {', '.join(sorted(missing_fields))}"
+        )
+    
+    if credentials_data.get('type') != 'service_account':
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="JSON file must be a Service Account key (type: 'service_account')"
         )
     
     # Update credentials
@@ -85,19 +105,12 @@ async def set_drive_credentials(
 
 @router.get("/credentials", response_model=schemas.DriveCredentialsResponse)
 async def get_drive_credentials(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_admin_user)
 ):
     """
     Get current Google Drive credentials status (without sensitive data).
     """
-    # Check if user has admin or superadmin role
-    if current_user.role not in [RoleEnum.ADMIN, RoleEnum.SUPERADMIN]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only admins and superadmins can access Google Drive settings"
-        )
-    admin = await crud.get_admin_by_user_id(db, current_user.id)
+    admin = current_user.admin_profile
     
     if not admin:
         return schemas.DriveCredentialsResponse(
@@ -106,36 +119,21 @@ async def get_drive_credentials(
             client_email=None
         )
     
-    # Get client_email from credentials if available
-    client_email = None
-    if admin.encrypted_drive_cred:
-        try:
-            creds = await crud.get_drive_credentials(db, current_user.id)
-            client_email = creds.get('client_email')
-        except:
-            pass
-    
     return schemas.DriveCredentialsResponse(
         drive_folder_id=admin.drive_folder_id,
         has_credentials=bool(admin.encrypted_drive_cred),
-        client_email=client_email
+        client_email=await _client_email(admin)
     )
 
 
 @router.delete("/credentials", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_drive_credentials(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_admin_user)
 ):
     """
     Delete Google Drive credentials for the current user.
     """
-    # Check if user has admin or superadmin role
-    if current_user.role not in [RoleEnum.ADMIN, RoleEnum.SUPERADMIN]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only admins and superadmins can delete Google Drive credentials"
-        )
     success = await crud.delete_drive_credentials(db, current_user.id)
     
     if not success:
@@ -151,18 +149,12 @@ async def delete_drive_credentials(
 async def update_drive_folder(
     folder_id: str,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_admin_user)
 ):
     """
     Update only the Google Drive folder ID (keep existing credentials).
     """
-    # Check if user has admin or superadmin role
-    if current_user.role not in [RoleEnum.ADMIN, RoleEnum.SUPERADMIN]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only admins and superadmins can update Google Drive folder"
-        )
-    admin = await crud.get_admin_by_user_id(db, current_user.id)
+    admin = current_user.admin_profile
     
     if not admin:
         raise HTTPException(
@@ -170,41 +162,24 @@ async def update_drive_folder(
             detail="Admin profile not found. Please set credentials first."
         )
     
-    admin.drive_folder_id = folder_id
-    await db.commit()
-    await db.refresh(admin)
-    
-    # Get client_email
-    client_email = None
-    if admin.encrypted_drive_cred:
-        try:
-            creds = await crud.get_drive_credentials(db, current_user.id)
-            client_email = creds.get('client_email')
-        except:
-            pass
+    # Single UPDATE ... RETURNING, no reload afterwards
+    admin = await crud.update_admin(db, admin.id, drive_folder_id=folder_id)
     
     return schemas.DriveCredentialsResponse(
         drive_folder_id=admin.drive_folder_id,
         has_credentials=bool(admin.encrypted_drive_cred),
-        client_email=client_email
+        client_email=await _client_email(admin)
     )
 
 
 @router.get("/folder/contents")
 async def list_folder_contents(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_admin_user)
 ):
     """List all files and folders in the configured Drive folder"""
-    if current_user.role not in [RoleEnum.ADMIN, RoleEnum.SUPERADMIN]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only admins and superadmins can access Drive contents"
-        )
-    
     try:
         # Get admin profile with credentials
-        admin = await crud.get_admin_by_user_id(db, current_user.id)
+        admin = current_user.admin_profile
         
         if not admin or not admin.encrypted_drive_cred:
             raise HTTPException(
@@ -219,7 +194,7 @@ async def list_folder_contents(
             )
         
         # List folder contents using Service Account
-        files = drive_service.list_folder_contents(
+        files = await drive_service.list_folder_contents(
             folder_id=admin.drive_folder_id,
             encrypted_creds=admin.encrypted_drive_cred
         )
@@ -242,18 +217,12 @@ async def list_folder_contents(
 @router.post("/folder/create-structure")
 async def create_folder_structure(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_admin_user)
 ):
     """Create initial folder structure for document management"""
-    if current_user.role not in [RoleEnum.ADMIN, RoleEnum.SUPERADMIN]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only admins and superadmins can create folder structure"
-        )
-    
     try:
         # Get admin profile with credentials
-        admin = await crud.get_admin_by_user_id(db, current_user.id)
+        admin = current_user.admin_profile
         
         if not admin or not admin.encrypted_drive_cred:
             raise HTTPException(
@@ -268,20 +237,16 @@ async def create_folder_structure(
             )
         
         # Create folder structure using Service Account
-        created_folders = drive_service.create_folder_structure(
+        created_folders = await drive_service.create_folder_structure(
             parent_folder_id=admin.drive_folder_id,
             encrypted_creds=admin.encrypted_drive_cred
         )
         
-        # Save folder IDs to database for quick navigation
-        admin.folder_pendientes_id = created_folders.get('Pendientes', {}).get('id')
-        admin.folder_en_revision_id = created_folders.get('En Revisión', {}).get('id')
-        admin.folder_aprobados_id = created_folders.get('Aprobados', {}).get('id')
-        admin.folder_rechazados_id = created_folders.get('Rechazados', {}).get('id')
-        admin.folder_archivados_id = created_folders.get('Archivados', {}).get('id')
-        
-        await db.commit()
-        await db.refresh(admin)
+        # Save folder IDs to database for quick navigation (one UPDATE ... RETURNING)
+        await crud.update_admin(db, admin.id, **{
+            column: created_folders.get(folder_name, {}).get('id')
+            for folder_name, column in _FOLDER_ID_COLUMNS.items()
+        })
         
         return {
             "message": "Folder structure created successfully",
@@ -1,14 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File as FastAPIFile
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-import io
+from datetime import datetime
 
 from app.db import get_db
-from app.schemas import FileResponse, FileListResponse, CommentCreate, CommentResponse, CommentUpdate
+from app.schemas import FileResponse, FileListResponse, CommentCreate, CommentResponse, CommentUpdate, construct_from_orm, dump_from_orm
 from app.auth import get_current_user
 from app import crud
-from app.models import User
+from app.models import User, RoleEnum
 from app.google_drive import drive_service
 
 router = APIRouter(prefix="/files", tags=["Files"])
@@ -23,10 +23,10 @@ async def upload_file(
     db: AsyncSession = Depends(get_db)
 ):
     """Upload a file to Google Drive"""
-    # Get user's admins
-    user_admins = await crud.get_user_admins(db, current_user.id)
+    # Get user's admin IDs (only the chosen admin's row is loaded below)
+    admin_ids = await crud.get_user_admin_ids(db, current_user.id)
     
-    if not user_admins:
+    if not admin_ids:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User is not associated with any admin. Please contact an administrator."
@@ -34,34 +34,31 @@ async def upload_file(
     
     # If admin_id provided, verify it's in user's admins
     if admin_id:
-        admin = next((a for a in user_admins if a.id == admin_id), None)
-        if not admin:
+        if admin_id not in admin_ids:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not associated with this admin"
             )
     else:
         # Use first admin by default
-        admin = user_admins[0]
+        admin_id = admin_ids[0]
+    
+    admin = await crud.get_admin_by_id(db, admin_id)
     
     # Check if admin has Drive credentials configured
-    if not admin.encrypted_drive_cred or not admin.drive_cred_type:
+    if not admin.encrypted_drive_cred:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Admin has not configured Google Drive credentials"
         )
     
-    # Read file content
-    file_content = await file.read()
-    
     try:
-        # Upload to Google Drive
+        # Stream the spooled upload straight to Google Drive (no in-memory copy)
         drive_file_id, file_size = await drive_service.upload_file(
-            file_content=file_content,
+            file_content=file.file,
             filename=file.filename,
             mime_type=file.content_type or 'application/octet-stream',
             encrypted_creds=admin.encrypted_drive_cred,
-            cred_type=admin.drive_cred_type,
             folder_id=admin.drive_folder_id
         )
         
@@ -87,41 +84,44 @@ async def upload_file(
         )
 
 
-@router.get("/", response_model=FileListResponse)
+# List endpoints serialize trusted rows straight to JSON with orjson, so
+# FastAPI is told not to validate them again (the schema stays in the docs)
+@router.get("/", response_model=None, responses={200: {"model": FileListResponse}})
 async def list_files(
     admin_id: Optional[int] = None,
     skip: int = 0,
     limit: int = 100,
+    after_created_at: Optional[datetime] = None,
+    after_id: Optional[int] = None,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """List files (filtered by user's admins for regular users)"""
     # If user is not admin/superadmin, only show files from their admins
-    if current_user.role.value == "user":
-        user_admins = await crud.get_user_admins(db, current_user.id)
-        admin_ids = [a.id for a in user_admins]
-        
-        if admin_id and admin_id not in admin_ids:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You are not associated with this admin"
-            )
-        
-        # Get files for user's admins
-        all_files = []
-        for aid in admin_ids:
-            if admin_id is None or aid == admin_id:
-                files = await crud.list_files(db, admin_id=aid, skip=skip, limit=limit)
-                all_files.extend(files)
-        
-        return FileListResponse(files=all_files, total=len(all_files))
+    if current_user.role == RoleEnum.USER:
+        if admin_id:
+            if not await crud.user_has_admin(db, current_user.id, admin_id):
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="You are not associated with this admin"
+                )
+            admin_filter = {'admin_id': admin_id}
+        else:
+            # Scoped in SQL to the user's admins, no need to load them first
+            admin_filter = {'member_user_id': current_user.id}
     else:
         # Admin/Superadmin can see all files or filtered by admin_id
-        files = await crud.list_files(db, admin_id=admin_id, skip=skip, limit=limit)
-        return FileListResponse(files=files, total=len(files))
+        admin_filter = {'admin_id': admin_id}
+    
+    files, total = await crud.list_files(
+        db, skip=skip, limit=limit,
+        after_created_at=after_created_at, after_id=after_id, **admin_filter
+    )
+    # Rows are already plain dicts of the FileResponse columns
+    return ORJSONResponse({'files': files, 'total': total})
 
 
-@router.get("/{file_id}", response_model=FileResponse)
+@router.get("/{file_id}", response_model=None, responses={200: {"model": FileResponse}})
 async def get_file(
     file_id: int,
     current_user: User = Depends(get_current_user),
@@ -136,16 +136,13 @@ async def get_file(
         )
     
     # Check access
-    if current_user.role.value == "user":
-        user_admins = await crud.get_user_admins(db, current_user.id)
-        admin_ids = [a.id for a in user_admins]
-        if file.owner_admin_id not in admin_ids:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied"
-            )
+    if current_user.role == RoleEnum.USER and not await crud.user_has_admin(db, current_user.id, file.owner_admin_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
     
-    return file
+    return construct_from_orm(FileResponse, file)
 
 
 @router.get("/{file_id}/download")
@@ -155,7 +152,7 @@ async def download_file(
     db: AsyncSession = Depends(get_db)
 ):
     """Download file from Google Drive"""
-    file = await crud.get_file_by_id(db, file_id)
+    file = await crud.get_file_with_owner(db, file_id)
     if not file:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -163,45 +160,48 @@ async def download_file(
         )
     
     # Check access
-    if current_user.role.value == "user":
-        user_admins = await crud.get_user_admins(db, current_user.id)
-        admin_ids = [a.id for a in user_admins]
-        if file.owner_admin_id not in admin_ids:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied"
-            )
+    if current_user.role == RoleEnum.USER and not await crud.user_has_admin(db, current_user.id, file.owner_admin_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
     
-    # Get admin
-    admin = await crud.get_admin_by_id(db, file.owner_admin_id)
+    # Owner admin was loaded with the file
+    admin = file.owner_admin
     if not admin or not admin.encrypted_drive_cred:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Admin Drive credentials not configured"
         )
     
+    chunks = drive_service.iter_download(
+        file_id=file.drive_file_id,
+        encrypted_creds=admin.encrypted_drive_cred
+    )
+    
     try:
-        # Download from Google Drive
-        file_content = await drive_service.download_file(
-            file_id=file.drive_file_id,
-            encrypted_creds=admin.encrypted_drive_cred,
-            cred_type=admin.drive_cred_type
-        )
-        
-        # Return as streaming response
-        return StreamingResponse(
-            io.BytesIO(file_content),
-            media_type=file.mime_type or 'application/octet-stream',
-            headers={
-                'Content-Disposition': f'attachment; filename="{file.filename}"'
-            }
-        )
-        
+        # Fetch the first chunk up front so Drive errors still become a 500
+        # instead of a truncated response
+        first_chunk = await anext(chunks, b'')
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error downloading file: {str(e)}"
         )
+    
+    async def stream_content():
+        yield first_chunk
+        async for chunk in chunks:
+            yield chunk
+    
+    # Relay chunks to the client as they arrive from Drive
+    return StreamingResponse(
+        stream_content(),
+        media_type=file.mime_type or 'application/octet-stream',
+        headers={
+            'Content-Disposition': f'attachment; filename="{file.filename}"'
+        }
+    )
 
 
 @router.delete("/{file_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -211,7 +211,7 @@ async def delete_file(
     db: AsyncSession = Depends(get_db)
 ):
     """Delete file"""
-    file = await crud.get_file_by_id(db, file_id)
+    file = await crud.get_file_with_owner(db, file_id)
     if not file:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -219,21 +219,20 @@ async def delete_file(
         )
     
     # Check permissions (only uploader or admin can delete)
-    if current_user.role.value == "user" and file.uploaded_by_user_id != current_user.id:
+    if current_user.role == RoleEnum.USER and file.uploaded_by_user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied"
         )
     
-    # Get admin
-    admin = await crud.get_admin_by_id(db, file.owner_admin_id)
+    # Owner admin was loaded with the file
+    admin = file.owner_admin
     if admin and admin.encrypted_drive_cred and file.drive_file_id:
         try:
             # Delete from Google Drive
             await drive_service.delete_file(
                 file_id=file.drive_file_id,
-                encrypted_creds=admin.encrypted_drive_cred,
-                cred_type=admin.drive_cred_type
+                encrypted_creds=admin.encrypted_drive_cred
             )
         except Exception as e:
             # Log error but continue with DB deletion
@@ -253,22 +252,20 @@ async def add_comment(
     db: AsyncSession = Depends(get_db)
 ):
     """Add comment to file"""
-    file = await crud.get_file_by_id(db, file_id)
-    if not file:
+    # File existence and the user's access come back from one query
+    has_access = await crud.check_file_access(db, file_id, current_user.id)
+    if has_access is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found"
         )
     
     # Check access
-    if current_user.role.value == "user":
-        user_admins = await crud.get_user_admins(db, current_user.id)
-        admin_ids = [a.id for a in user_admins]
-        if file.owner_admin_id not in admin_ids:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied"
-            )
+    if current_user.role == RoleEnum.USER and not has_access:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
     
     comment = await crud.create_comment(
         db=db,
@@ -279,32 +276,30 @@ async def add_comment(
     return comment
 
 
-@router.get("/{file_id}/comments", response_model=List[CommentResponse])
+@router.get("/{file_id}/comments", response_model=None, responses={200: {"model": List[CommentResponse]}})
 async def list_comments(
     file_id: int,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """List comments for file"""
-    file = await crud.get_file_by_id(db, file_id)
-    if not file:
+    # File existence and the user's access come back from one query
+    has_access = await crud.check_file_access(db, file_id, current_user.id)
+    if has_access is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found"
         )
     
     # Check access
-    if current_user.role.value == "user":
-        user_admins = await crud.get_user_admins(db, current_user.id)
-        admin_ids = [a.id for a in user_admins]
-        if file.owner_admin_id not in admin_ids:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied"
-            )
+    if current_user.role == RoleEnum.USER and not has_access:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
     
     comments = await crud.list_file_comments(db, file_id)
-    return comments
+    return ORJSONResponse([dump_from_orm(CommentResponse, comment) for comment in comments])
 
 
 @router.patch("/{file_id}/comments/{comment_id}", response_model=CommentResponse)
@@ -355,7 +350,7 @@ async def delete_comment(
         )
     
     # Only comment author or admin can delete
-    if comment.user_id != current_user.id and current_user.role.value == "user":
+    if comment.user_id != current_user.id and current_user.role == RoleEnum.USER:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied"
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
 from app.db import get_db
-from app.schemas import UserResponse, UserUpdate, AdminResponse, UserAdminAssociation
+from app.schemas import UserResponse, UserUpdate, AdminResponse, UserAdminAssociation, construct_from_orm, dump_from_orm
 from app.auth import get_current_user, get_admin_user
 from app import crud
 from app.models import User, RoleEnum
@@ -11,10 +12,13 @@ from app.models import User, RoleEnum
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
-@router.get("/me", response_model=UserResponse)
+# Read endpoints return trusted rows via construct_from_orm (or, for lists,
+# orjson-serialized dicts); response_model=None keeps FastAPI from
+# validating them a second time
+@router.get("/me", response_model=None, responses={200: {"model": UserResponse}})
 async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current user information"""
-    return current_user
+    return construct_from_orm(UserResponse, current_user)
 
 
 @router.patch("/me", response_model=UserResponse)
@@ -34,14 +38,14 @@ async def update_current_user(
     return updated_user
 
 
-@router.get("/me/admins", response_model=List[AdminResponse])
+@router.get("/me/admins", response_model=None, responses={200: {"model": List[AdminResponse]}})
 async def get_my_admins(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Get all admins associated with current user"""
     admins = await crud.get_user_admins(db, current_user.id)
-    return admins
+    return ORJSONResponse([dump_from_orm(AdminResponse, admin) for admin in admins])
 
 
 @router.post("/associate-admin", status_code=status.HTTP_200_OK)
@@ -88,19 +92,20 @@ async def disassociate_from_admin(
     return {"message": "User disassociated from admin successfully"}
 
 
-@router.get("/", response_model=List[UserResponse])
+@router.get("/", response_model=None, responses={200: {"model": List[UserResponse]}})
 async def list_all_users(
     skip: int = 0,
     limit: int = 100,
+    after_id: Optional[int] = None,
     current_user: User = Depends(get_admin_user),
     db: AsyncSession = Depends(get_db)
 ):
     """List all users (admin or superadmin only)"""
-    users = await crud.list_users(db, skip=skip, limit=limit)
-    return users
+    users = await crud.list_users(db, skip=skip, limit=limit, after_id=after_id)
+    return ORJSONResponse([dump_from_orm(UserResponse, user) for user in users])
 
 
-@router.get("/{user_id}", response_model=UserResponse)
+@router.get("/{user_id}", response_model=None, responses={200: {"model": UserResponse}})
 async def get_user(
     user_id: int,
     current_user: User = Depends(get_admin_user),
@@ -113,7 +118,7 @@ async def get_user(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-    return user
+    return construct_from_orm(UserResponse, user)
 
 
 @router.patch("/{user_id}", response_model=UserResponse)
@@ -1,17 +1,85 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, PrivateAttr, ValidationError, WithJsonSchema, model_validator
+from pydantic.networks import validate_email
+from typing import Annotated, Optional, List, Type, TypeVar
 from datetime import datetime
+import orjson
 from app.models import RoleEnum
 
+SchemaT = TypeVar('SchemaT', bound=BaseModel)
+
+
+def _validate_email(value: str) -> str:
+    """Normalized address, the same result EmailStr gives"""
+    return validate_email(value)[1]
+
+
+# Email field type shared by every schema (same validation and OpenAPI format as EmailStr)
+Email = Annotated[str, AfterValidator(_validate_email), WithJsonSchema({'type': 'string', 'format': 'email'})]
+
+
+class ORMBase(BaseModel):
+    """Base for response models read off ORM objects (immutable, validators built on first use)"""
+    model_config = ConfigDict(from_attributes=True, frozen=True, defer_build=True)
+
+
+def construct_from_orm(schema: Type[SchemaT], obj) -> SchemaT:
+    """
+    Build a response schema from a trusted ORM object without validating it
+    
+    Only for rows read from our own database; request bodies must still be
+    validated. Fields the object does not have keep their schema defaults.
+    """
+    values = {name: getattr(obj, name) for name in schema.model_fields if hasattr(obj, name)}
+    return schema.model_construct(**values)
+
+
+def dump_from_orm(schema: Type[BaseModel], obj) -> dict:
+    """
+    Read a response schema's fields off a trusted ORM object into a plain dict
+    
+    For list endpoints that hand the result straight to ORJSONResponse,
+    skipping model instances entirely. Missing fields get the schema default.
+    """
+    return {name: getattr(obj, name, field.default) for name, field in schema.model_fields.items()}
+
+
+def json_body(schema: Type[SchemaT]):
+    """
+    Dependency that validates the raw request body straight into a schema
+    
+    pydantic-core parses and validates the bytes in one pass, instead of the
+    body being decoded into a dict first. Failures are the usual 422 with
+    "body" locations. Pair with json_body_openapi so the body stays documented.
+    """
+    async def parse_body(request: Request) -> SchemaT:
+        try:
+            return schema.model_validate_json(await request.body())
+        except ValidationError as e:
+            raise RequestValidationError([{**error, 'loc': ('body', *error['loc'])} for error in e.errors()])
+    
+    return parse_body
+
+
+def json_body_openapi(schema: Type[BaseModel]) -> dict:
+    """openapi_extra describing a request body read through json_body"""
+    return {
+        'requestBody': {
+            'required': True,
+            'content': {'application/json': {'schema': schema.model_json_schema()}}
+        }
+    }
+
 
 # Auth Schemas
 class UserLogin(BaseModel):
-    email: EmailStr
+    email: Email
     password: str
 
 
 class UserRegister(BaseModel):
-    email: EmailStr
+    email: Email
     password: str = Field(..., min_length=8)
 
 
@@ -26,7 +94,7 @@ class TokenData(BaseModel):
 
 # User Schemas
 class UserBase(BaseModel):
-    email: EmailStr
+    email: Email
 
 
 class UserCreate(UserBase):
@@ -35,7 +103,7 @@ class UserCreate(UserBase):
 
 
 class UserUpdate(BaseModel):
-    email: Optional[EmailStr] = None
+    email: Optional[Email] = None
     password: Optional[str] = Field(None, min_length=8)
     role: Optional[RoleEnum] = None
 
@@ -44,13 +112,10 @@ class UserRoleUpdate(BaseModel):
     role: RoleEnum
 
 
-class UserResponse(UserBase):
+class UserResponse(UserBase, ORMBase):
     id: int
     role: RoleEnum
     created_at: datetime
-    
-    class Config:
-        from_attributes = True
 
 
 # Admin Schemas
@@ -59,7 +124,7 @@ class AdminBase(BaseModel):
 
 
 class AdminCreate(AdminBase):
-    pass
+    email: Email
 
 
 class AdminUpdate(BaseModel):
@@ -67,21 +132,36 @@ class AdminUpdate(BaseModel):
     drive_folder_id: Optional[str] = None
 
 
-class AdminResponse(AdminBase):
+class AdminResponse(AdminBase, ORMBase):
     id: int
     user_id: int
     drive_folder_id: Optional[str] = None
     has_drive_credentials: bool = False
     created_at: datetime
-    
-    class Config:
-        from_attributes = True
 
 
 class DriveCredentialsCreate(BaseModel):
     """Schema for creating/updating Google Drive Service Account credentials"""
     service_account_json: str = Field(..., min_length=10)  # Service account JSON file content
     drive_folder_id: str = Field(..., min_length=1)  # Required: Google Drive folder ID
+    
+    # service_account_json parsed once at validation (None if it is not a JSON object)
+    _credentials_data: Optional[dict] = PrivateAttr(default=None)
+    
+    @model_validator(mode='after')
+    def _parse_service_account_json(self):
+        # Bad JSON is not a validation error here, the router answers it with a 400
+        try:
+            data = orjson.loads(self.service_account_json)
+        except orjson.JSONDecodeError:
+            data = None
+        self._credentials_data = data if isinstance(data, dict) else None
+        return self
+    
+    @property
+    def credentials_data(self) -> Optional[dict]:
+        """Parsed Service Account key, or None when the JSON is invalid"""
+        return self._credentials_data
 
 
 class DriveCredentialsResponse(BaseModel):
@@ -104,7 +184,7 @@ class FileCreate(FileBase):
     pass
 
 
-class FileResponse(FileBase):
+class FileResponse(FileBase, ORMBase):
     id: int
     original_filename: str
     drive_file_id: Optional[str]
@@ -113,11 +193,9 @@ class FileResponse(FileBase):
     owner_admin_id: int
     uploaded_by_user_id: int
     created_at: datetime
-    
-    class Config:
-        from_attributes = True
 
 
+# Plain wrapper built per request, not read off an ORM row and never hashed
 class FileListResponse(BaseModel):
     files: List[FileResponse]
     total: int
@@ -136,18 +214,15 @@ class CommentUpdate(CommentBase):
     pass
 
 
-class CommentResponse(CommentBase):
+class CommentResponse(CommentBase, ORMBase):
     id: int
     file_id: int
     user_id: int
     created_at: datetime
     updated_at: datetime
-    
-    class Config:
-        from_attributes = True
 
 
-class CommentHistoryResponse(BaseModel):
+class CommentHistoryResponse(ORMBase):
     id: int
     comment_id: int
     action: str
@@ -155,9 +230,6 @@ class CommentHistoryResponse(BaseModel):
     new_text: Optional[str]
     actor_user_id: int
     timestamp: datetime
-    
-    class Config:
-        from_attributes = True
 
 
 # User-Admin Association
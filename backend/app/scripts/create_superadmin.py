@@ -18,9 +18,7 @@ async def create_superadmin():
     async with AsyncSessionLocal() as db:
         try:
             # Check if superadmin exists
-            superadmin = await crud.get_user_by_email(db, settings.SUPERADMIN_EMAIL)
-            
-            if superadmin:
+            if await crud.user_email_exists(db, settings.SUPERADMIN_EMAIL):
                 print(f"Superadmin already exists: {settings.SUPERADMIN_EMAIL}")
                 return
             
@@ -0,0 +1,123 @@
+import pytest
+from sqlalchemy import select
+
+from app import crud
+from app.models import Comment, CommentHistory
+
+
+async def create_files(db_session, admin_user, count):
+    """Create an admin profile with `count` files, returned newest first"""
+    admin = await crud.create_admin_profile(db_session, admin_user.id, "Test Admin")
+    files = [
+        await crud.create_file(
+            db_session,
+            filename=f"file{i}.txt",
+            original_filename=f"file{i}.txt",
+            owner_admin_id=admin.id,
+            uploaded_by_user_id=admin_user.id
+        )
+        for i in range(count)
+    ]
+    return admin, files[::-1]
+
+
+@pytest.mark.asyncio
+async def test_list_files_total_counts_after_cursor(db_session, test_admin_user):
+    """The total of a cursor page counts only the files after the cursor"""
+    admin, files = await create_files(db_session, test_admin_user, 5)
+    
+    first_page, total = await crud.list_files(db_session, admin_id=admin.id, limit=2)
+    assert [f["id"] for f in first_page] == [f.id for f in files[:2]]
+    assert total == 5
+    
+    last = first_page[-1]
+    next_page, total = await crud.list_files(
+        db_session, admin_id=admin.id, limit=10,
+        after_created_at=last["created_at"], after_id=last["id"]
+    )
+    assert [f["id"] for f in next_page] == [f.id for f in files[2:]]
+    assert total == 3
+
+
+@pytest.mark.asyncio
+async def test_list_files_past_the_end(db_session, test_admin_user):
+    """An empty page still reports the total for its filters and cursor"""
+    admin, files = await create_files(db_session, test_admin_user, 5)
+    
+    # Plain offset past the end
+    page, total = await crud.list_files(db_session, admin_id=admin.id, skip=10)
+    assert page == []
+    assert total == 5
+    
+    # Cursor after the oldest file, no skip
+    oldest = files[-1]
+    page, total = await crud.list_files(
+        db_session, admin_id=admin.id,
+        after_created_at=oldest.created_at, after_id=oldest.id
+    )
+    assert page == []
+    assert total == 0
+    
+    # Cursor plus a skip past the end of what follows it
+    cursor = files[1]
+    page, total = await crud.list_files(
+        db_session, admin_id=admin.id, skip=5,
+        after_created_at=cursor.created_at, after_id=cursor.id
+    )
+    assert page == []
+    assert total == 3
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_comments(db_session, test_user, test_admin_user):
+    """Returned IDs line up with the input rows and each gets a 'created' entry"""
+    admin, files = await create_files(db_session, test_admin_user, 2)
+    rows = [
+        {"file_id": files[i % 2].id, "user_id": user.id, "text": f"comment {i}"}
+        for i, user in enumerate([test_user, test_admin_user] * 3)
+    ]
+    
+    comment_ids = await crud.bulk_create_comments(db_session, rows)
+    assert len(comment_ids) == len(rows)
+    
+    result = await db_session.execute(select(Comment).where(Comment.id.in_(comment_ids)))
+    comments = {c.id: c for c in result.scalars()}
+    for comment_id, row in zip(comment_ids, rows):
+        comment = comments[comment_id]
+        assert (comment.file_id, comment.user_id, comment.text) == (row["file_id"], row["user_id"], row["text"])
+    
+    result = await db_session.execute(
+        select(CommentHistory).where(CommentHistory.comment_id.in_(comment_ids))
+    )
+    history = {h.comment_id: h for h in result.scalars()}
+    assert len(history) == len(rows)
+    for comment_id, row in zip(comment_ids, rows):
+        entry = history[comment_id]
+        assert entry.action == "created"
+        assert entry.new_text == row["text"]
+        assert entry.actor_user_id == row["user_id"]
+    
+    assert await crud.bulk_create_comments(db_session, []) == []
+
+
+@pytest.mark.asyncio
+async def test_bulk_append_history(db_session, test_admin_user):
+    """Every row becomes a history entry of its comment"""
+    admin, files = await create_files(db_session, test_admin_user, 1)
+    comment_ids = await crud.bulk_create_comments(db_session, [
+        {"file_id": files[0].id, "user_id": test_admin_user.id, "text": "before"}
+    ])
+    
+    await crud.bulk_append_history(db_session, [
+        {"comment_id": comment_ids[0], "action": "edited", "previous_text": "before",
+         "new_text": "after", "actor_user_id": test_admin_user.id},
+        {"comment_id": comment_ids[0], "action": "deleted", "previous_text": "after",
+         "actor_user_id": test_admin_user.id},
+    ])
+    
+    result = await db_session.execute(
+        select(CommentHistory.action)
+        .where(CommentHistory.comment_id == comment_ids[0])
+        .order_by(CommentHistory.id)
+    )
+    assert result.scalars().all() == ["created", "edited", "deleted"]
@@ -1,6 +1,24 @@
+import asyncio
+import base64
+import io
+import json
+import threading
+import time
+
+import httplib2
 import pytest
-from unittest.mock import Mock, patch
-from app.google_drive import GoogleDriveService
+from unittest.mock import AsyncMock, Mock, patch
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet
+from google.auth.exceptions import RefreshError
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaInMemoryUpload, MediaIoBaseUpload
+
+from app.config import settings
+from app.google_drive import (
+    DOWNLOAD_CONCURRENCY, DRIVE_BACKOFF_INITIAL, DRIVE_BACKOFF_MAX, DRIVE_CONCURRENCY_PER_ACCOUNT, DRIVE_MAX_ATTEMPTS,
+    RESUMABLE_UPLOAD_THRESHOLD, GoogleDriveService, _REQUIRED_CREDENTIAL_KEYS, _retry_delay
+)
 
 
 @pytest.fixture
@@ -27,39 +45,382 @@ def test_encrypt_decrypt_credentials(drive_service):
     assert decrypted == test_creds
 
 
+def test_encrypt_credentials_writes_aesgcm_blob(drive_service):
+    """New credentials are stored in the v2 (AES-GCM) format and round-trip"""
+    test_creds = {"type": "service_account", "client_email": "sa@test.iam.gserviceaccount.com"}
+    
+    encrypted = drive_service.encrypt_credentials(test_creds)
+    assert encrypted.startswith("v2:")
+    
+    # A fresh service has nothing cached, so this really decrypts
+    assert GoogleDriveService().decrypt_credentials(encrypted) == test_creds
+
+
+def test_decrypt_legacy_fernet_credentials(drive_service):
+    """Rows written by the original Fernet cipher stay readable"""
+    test_creds = {"type": "service_account", "project_id": "legacy-project"}
+    legacy_token = Fernet(settings.ENCRYPTION_KEY.encode()).encrypt(json.dumps(test_creds).encode()).decode()
+    
+    assert drive_service.decrypt_credentials(legacy_token) == test_creds
+
+
+def test_decrypt_tampered_credentials_raises(drive_service):
+    """A modified v2 blob fails authentication instead of decrypting"""
+    encrypted = drive_service.encrypt_credentials({"type": "service_account"})
+    sealed = bytearray(base64.urlsafe_b64decode(encrypted[len("v2:"):]))
+    sealed[-1] ^= 0x01
+    tampered = "v2:" + base64.urlsafe_b64encode(bytes(sealed)).decode()
+    
+    with pytest.raises(InvalidTag):
+        GoogleDriveService().decrypt_credentials(tampered)
+
+
+def mock_drive_files(drive_service, create_request):
+    """Patch get_drive_service so files().create returns create_request"""
+    mock_files = Mock()
+    mock_files.create.return_value = create_request
+    patcher = patch.object(drive_service, 'get_drive_service')
+    mock_service = patcher.start()
+    mock_service.return_value.files.return_value = mock_files
+    return patcher, mock_files
+
+
 @pytest.mark.asyncio
 async def test_upload_file_mock(drive_service):
-    """Test file upload with mocked Google Drive API"""
-    with patch.object(drive_service, 'get_drive_service') as mock_service:
-        # Mock the Drive service
-        mock_files = Mock()
-        mock_create = Mock()
-        mock_execute = Mock(return_value={'id': 'test-file-id', 'size': '1024'})
-        
-        mock_create.execute = mock_execute
-        mock_files.create.return_value = mock_create
-        mock_service.return_value.files.return_value = mock_files
+    """Small bytes go up in one multipart request through MediaInMemoryUpload"""
+    mock_create = Mock()
+    mock_create.execute.return_value = {'id': 'test-file-id', 'size': '1024'}
+    patcher, mock_files = mock_drive_files(drive_service, mock_create)
+    try:
+        encrypted = drive_service.encrypt_credentials({"type": "service_account", "project_id": "test"})
         
-        # Test credentials
-        test_creds = {"type": "service_account", "project_id": "test"}
-        encrypted = drive_service.encrypt_credentials(test_creds)
-        
-        # Upload file
-        file_content = b"test file content"
         file_id, file_size = await drive_service.upload_file(
-            file_content=file_content,
+            file_content=b"test file content",
             filename="test.txt",
             mime_type="text/plain",
             encrypted_creds=encrypted,
-            cred_type="service_account"
+            folder_id="folder-id"
         )
-        
-        assert file_id == 'test-file-id'
-        assert file_size == 1024
+    finally:
+        patcher.stop()
+    
+    assert file_id == 'test-file-id'
+    assert file_size == 1024
+    
+    create_kwargs = mock_files.create.call_args.kwargs
+    assert create_kwargs['body'] == {'name': 'test.txt', 'parents': ['folder-id']}
+    media = create_kwargs['media_body']
+    assert isinstance(media, MediaInMemoryUpload)
+    assert not media.resumable()
+    assert media.getbytes(0, media.size()) == b"test file content"
+    mock_create.execute.assert_called_once()
+    mock_create.next_chunk.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_upload_file_object(drive_service):
+    """File objects are streamed through MediaIoBaseUpload from the start"""
+    mock_create = Mock()
+    mock_create.execute.return_value = {'id': 'test-file-id', 'size': '17'}
+    patcher, mock_files = mock_drive_files(drive_service, mock_create)
+    file_obj = io.BytesIO(b"test file content")
+    file_obj.seek(5)
+    try:
+        file_id, file_size = await drive_service.upload_file(
+            file_content=file_obj,
+            filename="test.txt",
+            mime_type="text/plain",
+            encrypted_creds=drive_service.encrypt_credentials({"type": "service_account"})
+        )
+    finally:
+        patcher.stop()
+    
+    assert (file_id, file_size) == ('test-file-id', 17)
+    media = mock_files.create.call_args.kwargs['media_body']
+    assert isinstance(media, MediaIoBaseUpload)
+    assert not media.resumable()
+    assert media.size() == 17
+    assert media.getbytes(0, media.size()) == b"test file content"
+    mock_create.execute.assert_called_once()
 
 
-def test_validate_credentials_invalid(drive_service):
+@pytest.mark.asyncio
+async def test_upload_large_file_in_chunks(drive_service):
+    """Payloads at the threshold use a resumable session, one next_chunk per call"""
+    mock_create = Mock()
+    mock_create.next_chunk.side_effect = [
+        (Mock(), None),
+        (Mock(), None),
+        (None, {'id': 'big-file-id', 'size': str(RESUMABLE_UPLOAD_THRESHOLD)}),
+    ]
+    patcher, mock_files = mock_drive_files(drive_service, mock_create)
+    try:
+        file_id, file_size = await drive_service.upload_file(
+            file_content=bytes(RESUMABLE_UPLOAD_THRESHOLD),
+            filename="big.bin",
+            mime_type="application/octet-stream",
+            encrypted_creds=drive_service.encrypt_credentials({"type": "service_account"})
+        )
+    finally:
+        patcher.stop()
+    
+    assert (file_id, file_size) == ('big-file-id', RESUMABLE_UPLOAD_THRESHOLD)
+    media = mock_files.create.call_args.kwargs['media_body']
+    assert isinstance(media, MediaInMemoryUpload)
+    assert media.resumable()
+    assert mock_create.next_chunk.call_count == 3
+    mock_create.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_validate_credentials_invalid(drive_service):
     """Test credential validation with invalid credentials"""
     invalid_creds = {"invalid": "credentials"}
-    is_valid = drive_service.validate_credentials(invalid_creds, "service_account")
+    is_valid = await drive_service.validate_credentials(invalid_creds)
     assert is_valid == False
+
+
+@pytest.mark.asyncio
+async def test_validate_credentials_incomplete_skips_build(drive_service):
+    """A dict missing a required key is rejected without parsing anything"""
+    creds = {key: "x" for key in _REQUIRED_CREDENTIAL_KEYS - {'private_key'}}
+    with patch.object(drive_service, '_build_from_dict') as mock_build:
+        assert await drive_service.validate_credentials(creds) is False
+    mock_build.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_validate_credentials_complete_builds_and_lists(drive_service):
+    """A dict with every required key is built and checked against Drive"""
+    creds = {key: "x" for key in _REQUIRED_CREDENTIAL_KEYS}
+    mock_service = Mock()
+    mock_service.files.return_value.list.return_value.execute.return_value = {'files': []}
+    with patch.object(drive_service, '_build_from_dict', return_value=(Mock(), mock_service)) as mock_build:
+        assert await drive_service.validate_credentials(creds) is True
+    mock_build.assert_called_once_with(creds)
+    mock_service.files.return_value.list.return_value.execute.assert_called_once()
+
+
+def make_http_error(status, retry_after=None):
+    """HttpError as googleapiclient raises it for a given status"""
+    headers = {'status': str(status)}
+    if retry_after is not None:
+        headers['retry-after'] = retry_after
+    return HttpError(httplib2.Response(headers), b'')
+
+
+@pytest.mark.asyncio
+async def test_validate_credentials_malformed_key(drive_service):
+    """A complete dict whose private key does not parse is invalid"""
+    creds = {key: "x" for key in _REQUIRED_CREDENTIAL_KEYS}
+    assert await drive_service.validate_credentials(creds) is False
+
+
+def mock_validation_list(drive_service, side_effect):
+    """Patch _build_from_dict with a service whose files().list().execute has side_effect"""
+    mock_service = Mock()
+    mock_execute = mock_service.files.return_value.list.return_value.execute
+    mock_execute.side_effect = side_effect
+    return patch.object(drive_service, '_build_from_dict', return_value=(Mock(), mock_service)), mock_execute
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error", [make_http_error(401), make_http_error(403), RefreshError("invalid_grant")])
+async def test_validate_credentials_rejected_by_google(drive_service, error):
+    """Auth rejections from Google mean the credentials are invalid"""
+    creds = {key: "x" for key in _REQUIRED_CREDENTIAL_KEYS}
+    patcher, mock_execute = mock_validation_list(drive_service, [error])
+    with patcher:
+        assert await drive_service.validate_credentials(creds) is False
+    assert mock_execute.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_validate_credentials_retries_transient_errors(drive_service):
+    """A 5xx from Drive is retried, not reported as invalid credentials"""
+    creds = {key: "x" for key in _REQUIRED_CREDENTIAL_KEYS}
+    patcher, mock_execute = mock_validation_list(drive_service, [make_http_error(503), {'files': []}])
+    with patcher, patch('app.google_drive.asyncio.sleep', new=AsyncMock()):
+        assert await drive_service.validate_credentials(creds) is True
+    assert mock_execute.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_validate_credentials_raises_when_drive_keeps_failing(drive_service):
+    """Transient errors that outlast the retries propagate"""
+    creds = {key: "x" for key in _REQUIRED_CREDENTIAL_KEYS}
+    patcher, mock_execute = mock_validation_list(drive_service, make_http_error(429))
+    with patcher, patch('app.google_drive.asyncio.sleep', new=AsyncMock()):
+        with pytest.raises(HttpError):
+            await drive_service.validate_credentials(creds)
+    assert mock_execute.call_count == DRIVE_MAX_ATTEMPTS
+
+
+def test_retry_delay_honors_retry_after():
+    """Drive's Retry-After wins over backoff, capped at DRIVE_BACKOFF_MAX"""
+    assert _retry_delay(make_http_error(429, '3'), attempt=0) == 3.0
+    assert _retry_delay(make_http_error(429, '3600'), attempt=0) == DRIVE_BACKOFF_MAX
+
+
+def test_retry_delay_backoff_is_jittered_and_capped():
+    """Without a usable Retry-After the delay is half to all of the backoff step"""
+    for attempt in range(8):
+        backoff = min(DRIVE_BACKOFF_INITIAL * 2 ** attempt, DRIVE_BACKOFF_MAX)
+        delay = _retry_delay(make_http_error(503), attempt)
+        assert backoff / 2 <= delay <= backoff
+    
+    # HTTP-date Retry-After falls back to backoff
+    delay = _retry_delay(make_http_error(503, 'Wed, 21 Oct 2015 07:28:00 GMT'), attempt=0)
+    assert DRIVE_BACKOFF_INITIAL / 2 <= delay <= DRIVE_BACKOFF_INITIAL
+
+
+@pytest.mark.asyncio
+async def test_call_drive_retries_transient_errors(drive_service):
+    """429/5xx are retried, sleeping for the Retry-After between attempts"""
+    func = Mock(side_effect=[make_http_error(503, '2'), make_http_error(429, '1'), 'ok'])
+    
+    with patch('app.google_drive.asyncio.sleep', new=AsyncMock()) as sleep:
+        assert await drive_service._call_drive('creds', func) == 'ok'
+    
+    assert func.call_count == 3
+    assert [c.args[0] for c in sleep.await_args_list] == [2.0, 1.0]
+
+
+@pytest.mark.asyncio
+async def test_call_drive_gives_up_after_max_attempts(drive_service):
+    """The last retryable error is raised once DRIVE_MAX_ATTEMPTS is reached"""
+    func = Mock(side_effect=make_http_error(500, '0'))
+    
+    with patch('app.google_drive.asyncio.sleep', new=AsyncMock()):
+        with pytest.raises(HttpError):
+            await drive_service._call_drive('creds', func)
+    
+    assert func.call_count == DRIVE_MAX_ATTEMPTS
+
+
+@pytest.mark.asyncio
+async def test_call_drive_does_not_retry_client_errors(drive_service):
+    """A 404 is not transient and is raised straight away"""
+    func = Mock(side_effect=make_http_error(404))
+    
+    with patch('app.google_drive.asyncio.sleep', new=AsyncMock()) as sleep:
+        with pytest.raises(HttpError):
+            await drive_service._call_drive('creds', func)
+    
+    assert func.call_count == 1
+    sleep.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_call_drive_non_idempotent_only_retries_rate_limits(drive_service):
+    """Creates are retried on 429 but never on a 5xx that may have committed"""
+    func = Mock(side_effect=[make_http_error(429, '0'), make_http_error(503, '0'), 'created'])
+    
+    with patch('app.google_drive.asyncio.sleep', new=AsyncMock()):
+        with pytest.raises(HttpError) as exc_info:
+            await drive_service._call_drive('creds', func, idempotent=False)
+    
+    assert exc_info.value.resp.status == 503
+    assert func.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_call_drive_limits_concurrency_per_account(drive_service):
+    """No more than DRIVE_CONCURRENCY_PER_ACCOUNT calls run at once for one account"""
+    lock = threading.Lock()
+    running = peak = 0
+    
+    def func():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+    
+    await asyncio.gather(*(drive_service._call_drive('creds', func) for _ in range(DRIVE_CONCURRENCY_PER_ACCOUNT * 2)))
+    
+    assert peak == DRIVE_CONCURRENCY_PER_ACCOUNT
+
+
+def fake_media_download(content):
+    """MediaIoBaseDownload stand-in whose first next_chunk serves the start of content"""
+    class FakeMediaIoBaseDownload:
+        def __init__(self, fd, request, chunksize):
+            self.fd = fd
+            self.chunksize = chunksize
+        
+        def next_chunk(self):
+            self.fd.write(content[:self.chunksize])
+            status = Mock(resumable_progress=min(self.chunksize, len(content)), total_size=len(content))
+            return status, self.chunksize >= len(content)
+    
+    return FakeMediaIoBaseDownload
+
+
+@pytest.mark.asyncio
+async def test_iter_download_yields_ranges_in_order(drive_service):
+    """Ranged chunks come back in file order, ending with the partial last range"""
+    content = bytes(range(42))
+    
+    def fetch_range(service, file_id, start, end):
+        # Later ranges finish first, so ordering comes from the window
+        time.sleep(0.001 * (len(content) - start) / 4)
+        return content[start:end + 1]
+    
+    with patch.object(drive_service, 'get_drive_service'), \
+            patch('app.google_drive.MediaIoBaseDownload', fake_media_download(content)), \
+            patch.object(drive_service, '_fetch_range', side_effect=fetch_range) as fetch:
+        chunks = [chunk async for chunk in drive_service.iter_download('file-id', 'creds', chunk_size=4)]
+    
+    assert b''.join(chunks) == content
+    assert [len(chunk) for chunk in chunks] == [4] * 10 + [2]
+    assert [c.args[2:] for c in fetch.call_args_list] == [(start, min(start + 4, 42) - 1) for start in range(4, 42, 4)]
+
+
+@pytest.mark.asyncio
+async def test_iter_download_single_chunk(drive_service):
+    """A file that fits in the first chunk needs no ranged requests"""
+    content = b'small file'
+    
+    with patch.object(drive_service, 'get_drive_service'), \
+            patch('app.google_drive.MediaIoBaseDownload', fake_media_download(content)), \
+            patch.object(drive_service, '_fetch_range') as fetch:
+        chunks = [chunk async for chunk in drive_service.iter_download('file-id', 'creds', chunk_size=64)]
+    
+    assert chunks == [content]
+    fetch.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_iter_download_cancels_window_on_close(drive_service):
+    """Closing the stream (client went away) cancels the ranged requests in flight"""
+    content = bytes(64)
+    call_drive = drive_service._call_drive
+    never = asyncio.Event()
+    range_tasks = []
+    
+    async def fake_call_drive(encrypted_creds, func, *args, **kwargs):
+        if func is not drive_service._fetch_range:
+            return await call_drive(encrypted_creds, func, *args, **kwargs)
+        range_tasks.append(asyncio.current_task())
+        start = args[2]
+        if start > 4:
+            await never.wait()
+        return content[start:args[3] + 1]
+    
+    with patch.object(drive_service, 'get_drive_service'), \
+            patch('app.google_drive.MediaIoBaseDownload', fake_media_download(content)), \
+            patch.object(drive_service, '_call_drive', new=fake_call_drive):
+        chunks = drive_service.iter_download('file-id', 'creds', chunk_size=4)
+        assert await anext(chunks) == content[:4]
+        assert await anext(chunks) == content[4:8]
+        # Let the range scheduled after the second chunk start as well
+        await asyncio.sleep(0)
+        await chunks.aclose()
+        await asyncio.sleep(0)
+    
+    pending = range_tasks[1:]
+    assert len(pending) == DOWNLOAD_CONCURRENCY
+    assert all(task.cancelled() for task in pending)